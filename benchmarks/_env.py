@@ -0,0 +1,26 @@
+"""
+Fills in the configuration the bot needs to import, so benchmarks can run without
+a `.env` file. Nothing here connects to Discord, Postgres or the providers.
+"""
+
+import os
+
+_DEFAULTS = {
+    "TOKEN": "benchmark",
+    "NAME": "io",
+    "PREFIX": "io/",
+    "GODBOLT": "http://godbolt.invalid/api",
+    "PISTON": "http://piston.invalid/api/v2",
+    "OWNER_GUILD": "0",
+    "LOADING_EMOJI": "⏳",
+    "REPO_LINK": "https://github.com/Lunarmagpie/io",
+    "INVITE_LINK": "https://discord.com",
+    "DATABASE": "io",
+    "DATABASE_PORT": "5432",
+    "DATABASE_HOST": "localhost",
+    "DATABASE_USER": "io",
+    "DATABASE_PASSWORD": "io",
+}
+
+for key, value in _DEFAULTS.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,164 @@
+"""
+Memory footprint of the language catalog, before and after the compact catalog.
+
+Run with `python -m benchmarks.catalog_memory`.
+
+A synthetic `/compilers` payload shaped like Compiler Explorer's is decoded the
+old way (every field, non-slotted models, raw list kept for the bot's lifetime)
+and the new way (only the needed fields, slotted models with interned strings,
+raw list dropped once the catalog is built).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import gc
+import json
+import random
+import tracemalloc
+import typing as t
+
+from benchmarks import _env  # noqa: F401
+from bot.godbolt.models import COMPILER_FIELDS, Compiler
+from bot.version_manager import Provider, VersionManager
+
+COMPILER_COUNT = 4500
+LANGS = ["c", "c++", "rust", "go", "zig", "d", "fortran", "haskell", "swift", "nim"]
+LANGS += [f"lang{i}" for i in range(30)]
+TYPES = ["gcc", "clang", "icc", "icx", "msvc", "rustc", "ldc", "gccgo", ""]
+ISAS = ["amd64", "aarch64", "arm32", "riscv64", "mips", "ppc64", "wasm32"]
+
+
+def _payload() -> list[dict[str, t.Any]]:
+    rng = random.Random(0)
+    out: list[dict[str, t.Any]] = []
+    for i in range(COMPILER_COUNT):
+        compiler_type = rng.choice(TYPES)
+        isa = rng.choice(ISAS)
+        semver = f"{rng.randint(1, 17)}.{rng.randint(0, 9)}.{rng.randint(0, 9)}"
+        out.append(
+            {
+                "id": f"{compiler_type or 'c'}{i}",
+                "name": f"x86-64 {compiler_type} {semver}",
+                "lang": rng.choice(LANGS),
+                "compilerType": compiler_type,
+                "semver": semver,
+                "instructionSet": isa,
+                # A sample of the fields the full payload carries that the bot
+                # never reads.
+                "exe": f"/opt/compiler-explorer/{compiler_type}-{semver}/bin/cc",
+                "alias": [f"{compiler_type}{semver}"],
+                "options": "-O2 -pipe",
+                "versionFlag": "--version",
+                "notification": "",
+                "isSemVer": True,
+                "supportsBinary": True,
+                "supportsExecute": True,
+                "supportsLibraryCodeFilter": True,
+                "supportsOptOutput": False,
+                "group": f"{compiler_type}86",
+                "groupName": f"{compiler_type.upper()} x86-64",
+                "includeFlag": "-isystem",
+                "libsArr": [],
+                "tools": {},
+                "supportedLibraries": {},
+            }
+        )
+    return out
+
+
+@dataclasses.dataclass
+class _OldCompiler:
+    id: str
+    name: str
+    lang: str
+    compiler_type: str
+    semver: str
+    instruction_set: str
+
+
+@dataclasses.dataclass
+class _OldLanguage:
+    provider: Provider
+    name: str
+    full_name: str
+    version: str
+    is_executable: bool
+    is_explorable: bool
+    internal_id: str | None = None
+
+
+def _old(raw: bytes) -> object:
+    compilers = [
+        _OldCompiler(
+            id=p["id"],
+            name=p["name"],
+            lang=p["lang"],
+            compiler_type=p["compilerType"],
+            semver=p["semver"],
+            instruction_set=p["instructionSet"],
+        )
+        for p in json.loads(raw)
+    ]
+    langs: dict[str, list[_OldLanguage]] = {}
+    for c in compilers:
+        langs.setdefault(c.lang, []).append(
+            _OldLanguage(Provider.GODBOLT, c.lang, c.name, c.semver, True, True, c.id)
+        )
+    # The old client kept the raw list alive next to the catalog.
+    return compilers, langs
+
+
+class _FakeGodbolt:
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+
+    async def get_compilers(self) -> list[Compiler]:
+        return [Compiler.from_payload(p) for p in json.loads(self.raw)]
+
+    async def get_languages(self) -> list[t.Any]:
+        return []
+
+
+class _FakePiston:
+    async def get_runtimes(self) -> list[t.Any]:
+        return []
+
+
+def _new(raw: bytes) -> object:
+    manager = VersionManager()
+    manager._godbolt = _FakeGodbolt(raw)  # type: ignore
+    manager._piston = _FakePiston()  # type: ignore
+    asyncio.run(manager.update_once())
+    manager._godbolt = manager._piston = None
+    return manager.langs
+
+
+def _measure(f: t.Callable[[bytes], object], raw: bytes) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    kept = f(raw)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current, peak
+
+
+def main() -> None:
+    payload = _payload()
+    full = json.dumps(payload).encode()
+    trimmed = json.dumps([{k: p[k] for k in COMPILER_FIELDS} for p in payload]).encode()
+
+    old_current, old_peak = _measure(_old, full)
+    new_current, new_peak = _measure(_new, trimmed)
+
+    print(f"{COMPILER_COUNT} compilers")
+    print(f"payload:  {len(full) / 1024:8.1f} KiB -> {len(trimmed) / 1024:8.1f} KiB")
+    print(f"retained: {old_current / 1024:8.1f} KiB -> {new_current / 1024:8.1f} KiB")
+    print(f"peak:     {old_peak / 1024:8.1f} KiB -> {new_peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
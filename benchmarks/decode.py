@@ -0,0 +1,85 @@
+"""
+Time spent decoding provider responses, with the stdlib decoder and with orjson.
+
+Run with `python -m benchmarks.decode`.
+
+The old way is `json.loads` followed by the models built from unchecked fields,
+the new way is `bot.decode.parse`, which uses orjson and checks every field.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+import typing as t
+
+from benchmarks import _env  # noqa: F401
+from benchmarks.catalog_memory import _payload  # type: ignore
+from bot.decode import parse
+from bot.godbolt.client import _asm_response  # type: ignore
+from bot.godbolt.models import COMPILER_FIELDS, Compiler
+
+ROUNDS = 20
+ASM_LINES = 20000
+
+
+def _old_compiler(p: t.Any) -> Compiler:
+    return Compiler(
+        id=p["id"],
+        name=p["name"],
+        lang=sys.intern(p["lang"]),
+        compiler_type=sys.intern(p["compilerType"]),
+        semver=p["semver"],
+        instruction_set=sys.intern(p["instructionSet"]),
+    )
+
+
+def _asm() -> bytes:
+    return json.dumps(
+        {
+            "code": 0,
+            "stderr": [],
+            "asm": [
+                {
+                    "text": f"        mov     eax, DWORD PTR [rbp-{i % 64}]",
+                    "source": {"file": None, "line": i % 40 + 1, "column": 5},
+                    "labels": [],
+                }
+                for i in range(ASM_LINES)
+            ],
+        }
+    ).encode()
+
+
+def _time(f: t.Callable[[], object]) -> float:
+    """Median milliseconds per call."""
+    timings: list[float] = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        f()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[ROUNDS // 2] * 1000
+
+
+def main() -> None:
+    compilers = json.dumps(
+        [{k: p[k] for k in COMPILER_FIELDS} for p in _payload()]
+    ).encode()
+    asm = _asm()
+
+    old_compilers = _time(lambda: [_old_compiler(c) for c in json.loads(compilers)])
+    new_compilers = _time(
+        lambda: parse(compilers, lambda j: [Compiler.from_payload(c) for c in j])
+    )
+    old_asm = _time(lambda: _asm_response(json.loads(asm)))
+    new_asm = _time(lambda: parse(asm, _asm_response))
+
+    print(f"/compilers: {len(compilers) / 1024:8.1f} KiB", end=" ")
+    print(f"{old_compilers:6.2f} ms -> {new_compilers:6.2f} ms")
+    print(f"asm:        {len(asm) / 1024:8.1f} KiB", end=" ")
+    print(f"{old_asm:6.2f} ms -> {new_asm:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+Memory and CPU cost of the gateway profiles.
+
+Run with `python -m benchmarks.gateway_profile`.
+
+Synthetic gateway events for a full shard of guilds are fed through hikari's event
+manager and cache, the same way the shards would. Each profile only receives the
+events its intents subscribe to, like it would from Discord. Presences and member
+lists aren't included, since neither profile has the privileged intents for them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import random
+import time
+import tracemalloc
+import typing as t
+
+import hikari
+
+from benchmarks import _env  # noqa: F401
+from bot.app import gateway_settings
+
+GUILD_COUNT = 2500
+"""Discord's maximum amount of guilds per shard."""
+ROLES = 25
+CHANNELS = 40
+EMOJIS = 20
+THREADS = 3
+MESSAGES = 20000
+"""Messages sent in the bot's guilds while it is running."""
+
+MY_ID = 1
+SHARD_ID = 0
+
+_INTENTS: dict[str, hikari.Intents] = {
+    "GUILD_CREATE": hikari.Intents.GUILDS,
+    "MESSAGE_CREATE": hikari.Intents.GUILD_MESSAGES,
+    "MESSAGE_REACTION_ADD": hikari.Intents.GUILD_MESSAGE_REACTIONS,
+    "TYPING_START": hikari.Intents.GUILD_MESSAGE_TYPING,
+    "VOICE_STATE_UPDATE": hikari.Intents.GUILD_VOICE_STATES,
+}
+"""The intent Discord requires to send each event."""
+
+
+class _Shard:
+    id = SHARD_ID
+
+    def get_user_id(self) -> hikari.Snowflake:
+        return hikari.Snowflake(MY_ID)
+
+
+def _user(id: int) -> dict[str, t.Any]:
+    return {
+        "id": str(id),
+        "username": f"user{id}",
+        "discriminator": "0",
+        "global_name": f"User {id}",
+        "avatar": None,
+        "public_flags": 0,
+    }
+
+
+def _member(id: int) -> dict[str, t.Any]:
+    return {
+        "user": _user(id),
+        "nick": None,
+        "roles": [],
+        "joined_at": "2023-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+    }
+
+
+def _guild(rng: random.Random, guild_id: int) -> dict[str, t.Any]:
+    base = guild_id * 1000
+    channel_ids = range(base + 100, base + 100 + CHANNELS)
+    return {
+        "id": str(guild_id),
+        "name": f"guild {guild_id}",
+        "icon": None,
+        "splash": None,
+        "discovery_splash": None,
+        "banner": None,
+        "description": None,
+        "owner_id": str(base + 1),
+        "afk_channel_id": None,
+        "afk_timeout": 300,
+        "verification_level": 1,
+        "default_message_notifications": 1,
+        "explicit_content_filter": 0,
+        "features": ["COMMUNITY", "NEWS"],
+        "mfa_level": 0,
+        "application_id": None,
+        "widget_enabled": False,
+        "widget_channel_id": None,
+        "system_channel_id": str(channel_ids[0]),
+        "system_channel_flags": 0,
+        "rules_channel_id": None,
+        "public_updates_channel_id": None,
+        "max_presences": None,
+        "max_members": 500000,
+        "vanity_url_code": None,
+        "premium_tier": 0,
+        "premium_subscription_count": 0,
+        "preferred_locale": "en-US",
+        "max_video_channel_users": 25,
+        "nsfw_level": 0,
+        "premium_progress_bar_enabled": False,
+        "joined_at": "2023-01-01T00:00:00+00:00",
+        "large": True,
+        "unavailable": False,
+        "member_count": rng.randint(50, 50000),
+        "roles": [
+            {
+                "id": str(guild_id if i == 0 else base + 10 + i),
+                "name": f"role {i}",
+                "color": rng.randint(0, 0xFFFFFF),
+                "hoist": False,
+                "icon": None,
+                "unicode_emoji": None,
+                "position": i,
+                "permissions": "1071698660929",
+                "managed": False,
+                "mentionable": False,
+            }
+            for i in range(ROLES)
+        ],
+        "channels": [
+            {
+                "id": str(channel_id),
+                "type": 0 if i % 4 else 2,
+                "name": f"channel-{i}",
+                "position": i,
+                "permission_overwrites": [
+                    {"id": str(guild_id), "type": 0, "allow": "0", "deny": "1024"}
+                ],
+                "nsfw": False,
+                "topic": "A channel topic that is long enough to be realistic.",
+                "last_message_id": None,
+                "rate_limit_per_user": 0,
+                "parent_id": None,
+                "bitrate": 64000,
+                "user_limit": 0,
+                "rtc_region": None,
+            }
+            for i, channel_id in enumerate(channel_ids)
+        ],
+        "threads": [
+            {
+                "id": str(base + 900 + i),
+                "type": 11,
+                "guild_id": str(guild_id),
+                "parent_id": str(channel_ids[1]),
+                "owner_id": str(base + 1),
+                "name": f"thread {i}",
+                "last_message_id": None,
+                "rate_limit_per_user": 0,
+                "message_count": 10,
+                "member_count": 3,
+                "thread_metadata": {
+                    "archived": False,
+                    "auto_archive_duration": 1440,
+                    "archive_timestamp": "2023-01-01T00:00:00+00:00",
+                    "locked": False,
+                },
+                "flags": 0,
+            }
+            for i in range(THREADS)
+        ],
+        "emojis": [
+            {
+                "id": str(base + 500 + i),
+                "name": f"emoji{i}",
+                "roles": [],
+                "require_colons": True,
+                "managed": False,
+                "animated": False,
+                "available": True,
+            }
+            for i in range(EMOJIS)
+        ],
+        "stickers": [],
+        "members": [_member(MY_ID)],
+        "voice_states": [],
+        "presences": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+    }
+
+
+def _message(rng: random.Random, message_id: int) -> dict[str, t.Any]:
+    guild_id = rng.randint(1, GUILD_COUNT)
+    author = rng.randint(10**6, 10**7)
+    return {
+        "id": str(message_id),
+        "channel_id": str(guild_id * 1000 + 101),
+        "guild_id": str(guild_id),
+        "author": _user(author),
+        "member": {k: v for k, v in _member(author).items() if k != "user"},
+        "content": "hello there, this is a message nobody ran any code in",
+        "timestamp": "2023-01-01T00:00:00+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "flags": 0,
+    }
+
+
+def _events() -> list[tuple[str, dict[str, t.Any]]]:
+    rng = random.Random(0)
+    events: list[tuple[str, dict[str, t.Any]]] = []
+
+    for guild_id in range(1, GUILD_COUNT + 1):
+        events.append(("GUILD_CREATE", _guild(rng, guild_id)))
+
+    for i in range(MESSAGES):
+        message = _message(rng, 10**9 + i)
+        events.append(("MESSAGE_CREATE", message))
+        channel = {"channel_id": message["channel_id"], "guild_id": message["guild_id"]}
+        if i % 2:
+            events.append(
+                (
+                    "TYPING_START",
+                    {
+                        **channel,
+                        "user_id": message["author"]["id"],
+                        "member": {**message["member"], "user": message["author"]},
+                        "timestamp": 1672531200,
+                    },
+                )
+            )
+        if i % 3 == 0:
+            events.append(
+                (
+                    "MESSAGE_REACTION_ADD",
+                    {
+                        **channel,
+                        "message_id": message["id"],
+                        "user_id": message["author"]["id"],
+                        "member": {**message["member"], "user": message["author"]},
+                        "emoji": {"id": None, "name": "👍"},
+                    },
+                )
+            )
+        if i % 20 == 0:
+            events.append(
+                (
+                    "VOICE_STATE_UPDATE",
+                    {
+                        "guild_id": message["guild_id"],
+                        "channel_id": str(int(message["guild_id"]) * 1000 + 100),
+                        "user_id": message["author"]["id"],
+                        "member": {**message["member"], "user": message["author"]},
+                        "session_id": "session",
+                        "deaf": False,
+                        "mute": False,
+                        "self_deaf": False,
+                        "self_mute": False,
+                        "self_video": False,
+                        "suppress": False,
+                        "request_to_speak_timestamp": None,
+                    },
+                )
+            )
+
+    return events
+
+
+def _ready() -> dict[str, t.Any]:
+    return {
+        "v": 10,
+        "resume_gateway_url": "wss://gateway.invalid",
+        "session_id": "session",
+        "user": {**_user(MY_ID), "bot": True, "mfa_enabled": False, "flags": 0},
+        "guilds": [],
+        "application": {"id": str(MY_ID), "flags": 0},
+    }
+
+
+async def _feed(
+    profile: str, events: list[tuple[str, dict[str, t.Any]]]
+) -> tuple[hikari.GatewayBot, float]:
+    intents, cache_settings = gateway_settings(profile)
+    bot = hikari.GatewayBot(
+        "benchmark", intents=intents, cache_settings=cache_settings, banner=None
+    )
+
+    async def on_message(_: hikari.MessageEvent) -> None:
+        pass
+
+    # The same events the bot listens to.
+    bot.subscribe(hikari.MessageCreateEvent, on_message)
+    bot.subscribe(hikari.MessageUpdateEvent, on_message)
+    bot.subscribe(hikari.MessageDeleteEvent, on_message)
+
+    shard = t.cast(hikari.api.GatewayShard, _Shard())
+    received = [("READY", _ready())] + [
+        (name, payload) for name, payload in events if intents & _INTENTS[name]
+    ]
+
+    started = time.process_time()
+    for i, (name, payload) in enumerate(received):
+        bot.event_manager.consume_raw_event(name, shard, payload)
+        if i % 500 == 0:
+            await _settle()
+    await _settle()
+
+    return bot, time.process_time() - started
+
+
+async def _settle() -> None:
+    current = asyncio.current_task()
+    while tasks := [task for task in asyncio.all_tasks() if task is not current]:
+        await asyncio.gather(*tasks)
+
+
+def _measure(
+    profile: str, events: list[tuple[str, dict[str, t.Any]]]
+) -> tuple[int, float]:
+    # CPU time is measured separately, since tracing allocations slows hikari down.
+    bot, cpu = asyncio.run(_feed(profile, events))
+    assert bot.get_me(), "`get_me()` has to work in every profile."
+    del bot
+
+    gc.collect()
+    tracemalloc.start()
+    bot, _ = asyncio.run(_feed(profile, events))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del bot
+
+    return current, cpu
+
+
+def main() -> None:
+    events = _events()
+
+    full_memory, full_cpu = _measure("full", events)
+    lean_memory, lean_cpu = _measure("lean", events)
+
+    print(f"{GUILD_COUNT} guilds, {MESSAGES} messages, {len(events)} events")
+    print(f"retained: {full_memory / 1024:8.0f} KiB -> {lean_memory / 1024:8.0f} KiB")
+    print(f"cpu:      {full_cpu:8.2f} s   -> {lean_cpu:8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
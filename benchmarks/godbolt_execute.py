@@ -0,0 +1,193 @@
+"""
+Response size and latency of Godbolt runs, before and after lean execute requests.
+
+Run with `python -m benchmarks.godbolt_execute`.
+
+A local stand-in for Compiler Explorer answers compile requests the way the real
+API does. A request that asks for asm and execution gets the asm listing with the
+execution result. An execute request gets the asm listing of the build unless
+`skipAsm` is set. Runs are sent the old way, as the combined asm and execute
+request every run used to be, and through `VersionManager.execute`. The stand-in
+doesn't spend any time generating asm, so the real API saves more time than is
+measured here.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import time
+import typing as t
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks import _env  # noqa: F401
+from bot.config import BackendConfig
+from bot.godbolt.client import _ASM_FILTERS, _combined_response  # type: ignore
+from bot.response import RunResponse
+from bot.tasks import TaskSupervisor
+from bot.version_manager import VersionManager
+
+REQUESTS = 200
+ASM_LINES = 5000
+"""Lines of asm in the listing of a small program that is linked and executed."""
+OUTPUT_LINES = 20
+COMPILER_ID = "g132"
+
+
+def _asm() -> list[dict[str, t.Any]]:
+    return [
+        {
+            "text": f"        mov     eax, DWORD PTR [rbp-{i % 64}]",
+            "source": {"file": None, "line": i % 40 + 1, "column": 5},
+            "labels": [],
+        }
+        for i in range(ASM_LINES)
+    ]
+
+
+ASM = _asm()
+
+
+def _run(options: t.Any) -> dict[str, t.Any]:
+    build_result: dict[str, t.Any] = {
+        "code": 0,
+        "stdout": [],
+        "stderr": [],
+        "inputFilename": "/tmp/compiler-explorer-compiler/example.cpp",
+        "compilationOptions": ["-g", "-o", "/tmp/output.s", "-O2", "example.cpp"],
+        "downloads": [],
+        "executableFilename": "/tmp/compiler-explorer-compiler/output.s",
+        "tools": [],
+    }
+    if not options["compilerOptions"].get("skipAsm"):
+        build_result["asm"] = ASM
+
+    return {
+        "code": 0,
+        "okToCache": True,
+        "timedOut": False,
+        "stdout": [
+            {"text": f"line {i} of output", "tag": {"line": i, "column": 0}}
+            for i in range(OUTPUT_LINES)
+        ],
+        "stderr": [],
+        "execTime": "12",
+        "buildResult": build_result,
+    }
+
+
+def _response(options: t.Any) -> dict[str, t.Any]:
+    if options["compilerOptions"].get("executorRequest"):
+        return _run(options)
+
+    # A compile request, which also executes the code with the `execute` filter. The
+    # asm is only listed once, at the top.
+    response: dict[str, t.Any] = {"code": 0, "stdout": [], "stderr": [], "asm": ASM}
+    if options["filters"].get("execute"):
+        response["execResult"] = _run({"compilerOptions": {"skipAsm": True}})
+    return response
+
+
+class _StandIn:
+    def __init__(self) -> None:
+        self.sizes: list[int] = []
+
+    async def compile(self, request: web.Request) -> web.Response:
+        body = json.dumps(_response((await request.json())["options"])).encode()
+        self.sizes.append(len(body))
+        return web.Response(body=body, content_type="application/json")
+
+    async def compilers(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            [
+                {
+                    "id": COMPILER_ID,
+                    "name": "x86-64 gcc 13.2",
+                    "lang": "c++",
+                    "compilerType": "gcc",
+                    "semver": "13.2",
+                    "instructionSet": "amd64",
+                }
+            ]
+        )
+
+    async def languages(self, _: web.Request) -> web.Response:
+        return web.json_response([])
+
+    async def runtimes(self, _: web.Request) -> web.Response:
+        return web.json_response([])
+
+
+async def _old_execute(session: aiohttp.ClientSession, url: str) -> RunResponse:
+    async with session.post(
+        url + f"/compiler/{COMPILER_ID}/compile",
+        json={
+            "source": "int main() {}",
+            "lang": "c++",
+            "options": {
+                "compilerOptions": {"executorRequest": False},
+                "filters": {**_ASM_FILTERS, "execute": True},
+            },
+        },
+    ) as resp:
+        return _combined_response(await resp.json())[1]
+
+
+async def _time(
+    f: t.Callable[[], t.Awaitable[object]], stand_in: _StandIn
+) -> tuple[float, float]:
+    """Mean response size in KiB and median latency in milliseconds."""
+    stand_in.sizes.clear()
+    latencies: list[float] = []
+
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        await f()
+        latencies.append(time.perf_counter() - start)
+
+    return statistics.mean(stand_in.sizes) / 1024, statistics.median(latencies) * 1000
+
+
+async def main() -> None:
+    stand_in = _StandIn()
+    app = web.Application()
+    app.router.add_post("/api/compiler/{id}/compile", stand_in.compile)
+    app.router.add_get("/api/compilers", stand_in.compilers)
+    app.router.add_get("/api/languages", stand_in.languages)
+    app.router.add_get("/api/runtimes", stand_in.runtimes)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}/api"
+
+    versions = await VersionManager.build(
+        piston_backends=[BackendConfig(url=url)],
+        godbolt_backends=[BackendConfig(url=url)],
+        tasks=TaskSupervisor(),
+    )
+    await versions.update_once()
+
+    async with aiohttp.ClientSession() as session:
+        old_size, old_latency = await _time(
+            lambda: _old_execute(session, url), stand_in
+        )
+    new_size, new_latency = await _time(
+        lambda: versions.execute("c++", "int main() {}", "13.2"), stand_in
+    )
+
+    await versions.close()
+    await runner.cleanup()
+
+    print(f"{REQUESTS} runs, {ASM_LINES} lines of asm")
+    print(f"response: {old_size:8.1f} KiB -> {new_size:8.1f} KiB")
+    print(f"latency:  {old_latency:8.2f} ms  -> {new_latency:8.2f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,25 +1,36 @@
-import crescent
-import flare
-import hikari
-import miru
+import argparse
 
-from bot.config import CONFIG
-from bot.model import Model
+from bot import profiling
 
-bot = hikari.GatewayBot(
-    CONFIG.TOKEN,
-    intents=hikari.Intents.ALL_UNPRIVILEGED | hikari.Intents.MESSAGE_CONTENT,
-)
-flare.install(bot)
-miru.install(bot)
-model = Model()
 
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m bot")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import and initialization time per module and phase.",
+    )
+    args = parser.parse_args()
 
-client = crescent.Client(bot, model)
+    if args.profile_startup:
+        profiling.enable()
 
-client.plugins.load_folder("bot.plugins")
+    with profiling.phase("import bot"):
+        from bot import app
+        from bot.config import CONFIG
 
-print(f"Starting version {CONFIG.VERSION}...")
+    if CONFIG.CLUSTER_WORKERS > 1:
+        from bot.cluster import Supervisor
 
-bot.subscribe(hikari.StartingEvent, model.on_start)
-bot.run()
+        Supervisor(
+            workers=CONFIG.CLUSTER_WORKERS,
+            shard_count=CONFIG.SHARD_COUNT,
+            # Workers stop within STOP_TIMEOUT, plus the time to close their shards.
+            stop_timeout=CONFIG.STOP_TIMEOUT + 3,
+        ).run()
+    else:
+        app.run(shard_count=CONFIG.SHARD_COUNT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import typing as t
+
+import crescent
+import flare
+import hikari
+import miru
+
+from bot import profiling
+from bot.config import CONFIG
+from bot.model import Model
+
+__all__: list[str] = ["build", "gateway_settings", "run"]
+
+
+def gateway_settings(
+    profile: str,
+) -> tuple[hikari.Intents, hikari.impl.CacheSettings]:
+    """The intents and cache settings of a gateway profile."""
+    if profile == "full":
+        return (
+            hikari.Intents.ALL_UNPRIVILEGED | hikari.Intents.MESSAGE_CONTENT,
+            hikari.impl.CacheSettings(),
+        )
+
+    # Message commands are the only events handled, interactions need no intents.
+    # `get_me()` is the only cache lookup, guild IDs come from the events.
+    return (
+        hikari.Intents.GUILD_MESSAGES
+        | hikari.Intents.DM_MESSAGES
+        | hikari.Intents.MESSAGE_CONTENT,
+        hikari.impl.CacheSettings(components=hikari.api.CacheComponents.ME),
+    )
+
+
+def build() -> hikari.GatewayBot:
+    """Create the bot with every plugin loaded."""
+    with profiling.phase("create bot"):
+        intents, cache_settings = gateway_settings(CONFIG.GATEWAY_PROFILE)
+        bot = hikari.GatewayBot(
+            CONFIG.TOKEN, intents=intents, cache_settings=cache_settings
+        )
+        flare.install(bot)
+        miru.install(bot)
+        model = Model()
+
+        client = crescent.Client(bot, model)
+
+    with profiling.phase("load plugins"):
+        client.plugins.load_folder("bot.plugins")
+
+    bot.subscribe(hikari.StartingEvent, model.on_start)
+    bot.subscribe(hikari.StoppingEvent, model.on_stop)
+
+    return bot
+
+
+def run(
+    bot: hikari.GatewayBot | None = None,
+    *,
+    shard_ids: t.Sequence[int] | None = None,
+    shard_count: int | None = None,
+) -> None:
+    bot = bot or build()
+
+    if profiling.is_enabled():
+
+        async def on_started(_: hikari.StartedEvent) -> None:
+            print(profiling.report())
+
+        bot.subscribe(hikari.StartedEvent, on_started)
+
+    print(f"Starting version {CONFIG.VERSION}...")
+
+    bot.run(shard_ids=shard_ids, shard_count=shard_count)
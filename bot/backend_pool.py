@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+import typing as t
+
+import aiohttp
+from result import Err
+
+from bot.config import BackendConfig
+from bot.hedging import HedgePolicy
+from bot.tasks import TaskSupervisor
+
+__all__: list[str] = ["Backend", "BackendPool", "response_error"]
+
+LOG = logging.getLogger(__file__)
+
+T = t.TypeVar("T")
+
+
+def response_error(resp: aiohttp.ClientResponse) -> Err[str] | None:
+    """
+    The error for a response that failed because of the request, or `None` if it
+    succeeded. Server errors mean the backend is down, so they are raised instead
+    and count against the backend and its provider.
+    """
+    try:
+        resp.raise_for_status()
+    except aiohttp.ClientResponseError as e:
+        if e.status >= 500:
+            raise
+        return Err("An unexpected error occurred:" + e.message)
+
+    return None
+
+
+class Backend:
+    """A single node of a provider."""
+
+    def __init__(self, config: BackendConfig, session: aiohttp.ClientSession) -> None:
+        self.url = config.url.removesuffix("/")
+        self.weight = config.weight
+        self.langs = config.langs
+        """Languages this backend is limited to, `None` if it runs everything."""
+        self.session = session
+        """Each backend has its own session, so it has its own connection pool."""
+
+        self.runtimes: set[t.Hashable] | None = None
+        """Runtimes this backend reported. `None` until its catalog is fetched."""
+        self.outstanding = 0
+        """Requests that have been sent and haven't finished yet."""
+        self.healthy = True
+        self.failures = 0
+        """Failed requests in a row."""
+
+    def __str__(self) -> str:
+        return self.url
+
+    @property
+    def load(self) -> float:
+        return (self.outstanding + 1) / self.weight
+
+    def serves(self, lang: str | None, runtime: t.Hashable | None) -> bool:
+        if lang is not None and self.langs is not None and lang not in self.langs:
+            return False
+        if runtime is not None and self.runtimes is not None:
+            return runtime in self.runtimes
+        return True
+
+
+class BackendPool:
+    """
+    Balances requests over the backends of a provider.
+
+    Requests go to the healthy backend with the least outstanding requests relative
+    to its weight. A backend is drained after `max_failures` failed requests in a
+    row or a failed health check, and restored once a health check passes.
+
+    With a hedging policy, slow requests are also sent to a second backend and
+    whichever answers first is used.
+    """
+
+    def __init__(
+        self,
+        backends: list[Backend],
+        *,
+        health_path: str,
+        health_interval: float = 30,
+        max_failures: int = 3,
+        hedging: HedgePolicy | None = None,
+        headers: dict[str, str] | None = None,
+        connections: int = 20,
+    ) -> None:
+        """`connections` is the connection limit of each backend."""
+        self.backends = backends
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.max_failures = max_failures
+        self.hedging = hedging
+        self.headers = headers or {}
+        self.connections = connections
+        self._health_task: asyncio.Task[t.NoReturn] | None = None
+
+    @classmethod
+    async def build(
+        cls,
+        configs: t.Sequence[BackendConfig],
+        *,
+        tasks: TaskSupervisor,
+        headers: dict[str, str],
+        health_path: str,
+        connections: int = 20,
+        hedging: HedgePolicy | None = None,
+    ) -> t.Self:
+        self = cls(
+            [],
+            health_path=health_path,
+            hedging=hedging,
+            headers=headers,
+            connections=connections,
+        )
+        self.backends = [self._create_backend(config) for config in configs]
+        self._health_task = tasks.supervise(self._health_loop, name="health checks")
+        return self
+
+    async def close(self) -> None:
+        if self._health_task:
+            self._health_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._health_task
+
+        for backend in self.backends:
+            await backend.session.close()
+
+    async def reconfigure(self, configs: t.Sequence[BackendConfig]) -> None:
+        """
+        Replace the backends of the pool. Backends that are kept keep their
+        connection pool. Backends that are removed stop getting requests, and are
+        closed once their outstanding requests finish.
+        """
+        current = {backend.url: backend for backend in self.backends}
+        backends: list[Backend] = []
+
+        for config in configs:
+            if backend := current.pop(config.url.removesuffix("/"), None):
+                backend.weight = config.weight
+                backend.langs = config.langs
+            else:
+                backend = self._create_backend(config)
+            backends.append(backend)
+
+        self.backends = backends
+        await asyncio.gather(*map(self._retire, current.values()))
+
+    def _create_backend(self, config: BackendConfig) -> Backend:
+        return Backend(
+            config,
+            aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.connections),
+            ),
+        )
+
+    async def _retire(self, backend: Backend, timeout: float = 60) -> None:
+        with contextlib.suppress(TimeoutError):
+            async with asyncio.timeout(timeout):
+                while backend.outstanding:
+                    await asyncio.sleep(0.5)
+
+        await backend.session.close()
+
+    def pick(
+        self,
+        lang: str | None = None,
+        runtime: t.Hashable | None = None,
+        *,
+        exclude: t.Collection[Backend] = (),
+    ) -> Backend | None:
+        """
+        Return the least loaded backend that can run the runtime. If every backend
+        that can run it is drained, one of them is tried anyway.
+        """
+        candidates = [
+            backend
+            for backend in self.backends
+            if backend not in exclude and backend.serves(lang, runtime)
+        ]
+        healthy = [backend for backend in candidates if backend.healthy]
+
+        return min(healthy or candidates, key=lambda b: b.load, default=None)
+
+    @contextlib.asynccontextmanager
+    async def use(self, backend: Backend) -> t.AsyncGenerator[Backend, None]:
+        """Track a request to a backend."""
+        backend.outstanding += 1
+        try:
+            yield backend
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self._failed(backend)
+            raise
+        else:
+            backend.failures = 0
+        finally:
+            backend.outstanding -= 1
+
+    async def request(
+        self,
+        lang: str | None,
+        runtime: t.Hashable | None,
+        send: t.Callable[[Backend], t.Awaitable[T]],
+    ) -> T | None:
+        """
+        Send a request with `send` to the least loaded backend that can run the
+        runtime, hedging it if it is slow. Returns `None` if no backend can run it.
+        """
+        backend = self.pick(lang, runtime)
+        if not backend:
+            return None
+
+        hedging = self.hedging
+        delay = hedging.delay(runtime) if hedging else None
+        if hedging is None or delay is None:
+            return await self._send(backend, runtime, send)
+
+        original = asyncio.create_task(self._send(backend, runtime, send))
+        tasks = {original}
+        error: BaseException | None = None
+
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+
+            if (
+                not done
+                and (other := self.pick(lang, runtime, exclude=(backend,)))
+                and hedging.try_hedge()
+            ):
+                tasks.add(asyncio.create_task(self._send(other, runtime, send)))
+
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if (exception := task.exception()) is not None:
+                        error = error or exception
+                        continue
+
+                    if task is not original:
+                        hedging.wins += 1
+                    return task.result()
+
+            assert error
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _send(
+        self,
+        backend: Backend,
+        runtime: t.Hashable | None,
+        send: t.Callable[[Backend], t.Awaitable[T]],
+    ) -> T:
+        start = time.monotonic()
+
+        async with self.use(backend):
+            result = await send(backend)
+
+        if self.hedging:
+            self.hedging.record(runtime, time.monotonic() - start)
+
+        return result
+
+    def _failed(self, backend: Backend) -> None:
+        backend.failures += 1
+        if backend.healthy and backend.failures >= self.max_failures:
+            LOG.warning(f"Draining {backend} after {backend.failures} failures.")
+            backend.healthy = False
+
+    async def _check(self, backend: Backend) -> None:
+        try:
+            async with backend.session.get(
+                backend.url + self.health_path,
+                timeout=aiohttp.ClientTimeout(total=10),
+            ) as resp:
+                healthy = resp.ok
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            healthy = False
+
+        if healthy and not backend.healthy:
+            LOG.warning(f"Restoring {backend}.")
+            backend.failures = 0
+        elif not healthy and backend.healthy:
+            LOG.warning(f"Draining {backend}, its health check failed.")
+
+        backend.healthy = healthy
+
+    async def _health_loop(self) -> t.NoReturn:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*map(self._check, self.backends))
@@ -0,0 +1,95 @@
+import collections
+import enum
+import time
+
+__all__: list[str] = ["CircuitBreaker", "CircuitState"]
+
+
+class CircuitState(enum.Enum):
+    CLOSED = enum.auto()
+    """Requests are sent normally."""
+    OPEN = enum.auto()
+    """The provider is unhealthy, requests fail fast."""
+    HALF_OPEN = enum.auto()
+    """The cooldown is over and a single trial request is allowed through."""
+
+
+class CircuitBreaker:
+    """
+    Tracks the health of a provider over its most recent requests.
+
+    The circuit opens when too many of the recent requests failed or were slow. It
+    stays open for `cooldown` seconds, then lets a single trial request through. The
+    circuit closes if the trial succeeds and opens again if it doesn't.
+    """
+
+    def __init__(
+        self,
+        *,
+        window: int = 20,
+        min_requests: int = 5,
+        failure_rate: float = 0.5,
+        slow_after: float = 20,
+        slow_rate: float = 0.8,
+        cooldown: float = 30,
+    ) -> None:
+        self.min_requests = min_requests
+        self.failure_rate = failure_rate
+        self.slow_after = slow_after
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+
+        self.state = CircuitState.CLOSED
+        self._outcomes: collections.deque[tuple[bool, float]] = collections.deque(
+            maxlen=window
+        )
+        """(succeeded, latency) of the most recent requests."""
+        self._opened_at = 0.0
+        self._trial_running = False
+
+    def allow(self) -> bool:
+        """Return `True` if a request may be sent right now."""
+        match self.state:
+            case CircuitState.CLOSED:
+                return True
+            case CircuitState.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self.state = CircuitState.HALF_OPEN
+                self._trial_running = True
+                return True
+            case CircuitState.HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+                return True
+
+    def record(self, *, succeeded: bool, latency: float) -> None:
+        """Record the outcome of a request that `allow` let through."""
+        if self.state == CircuitState.HALF_OPEN:
+            self._trial_running = False
+            if succeeded and latency < self.slow_after:
+                self.state = CircuitState.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+
+        self._outcomes.append((succeeded, latency))
+
+        if len(self._outcomes) < self.min_requests:
+            return
+
+        failures = sum(not ok for ok, _ in self._outcomes)
+        slow = sum(latency >= self.slow_after for _, latency in self._outcomes)
+
+        if (
+            failures / len(self._outcomes) >= self.failure_rate
+            or slow / len(self._outcomes) >= self.slow_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self.state = CircuitState.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
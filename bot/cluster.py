@@ -0,0 +1,283 @@
+"""
+Runs the bot as several worker processes that each own a contiguous range of
+shards. Every worker builds its own bot, provider clients and catalog, so the CPU
+work is spread over multiple cores.
+
+The supervisor restarts workers that crash or stop sending heartbeats, and does a
+rolling restart of every worker when it receives `SIGHUP`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import multiprocessing.process
+import multiprocessing.sharedctypes
+import signal
+import time
+import types
+import typing as t
+
+import hikari
+
+from bot import app
+from bot.config import CONFIG
+
+__all__: list[str] = ["Supervisor", "fetch_shard_count", "split_shards"]
+
+LOG = logging.getLogger(__file__)
+
+# Workers are spawned instead of forked so they don't inherit the supervisor's
+# event loop or sockets.
+_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def split_shards(shard_count: int, workers: int) -> list[list[int]]:
+    """Split the shard IDs into `workers` contiguous ranges of near equal size."""
+    workers = max(1, min(workers, shard_count))
+    size, extra = divmod(shard_count, workers)
+
+    out: list[list[int]] = []
+    start = 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        out.append(list(range(start, end)))
+        start = end
+
+    return out
+
+
+async def fetch_shard_count() -> int:
+    """Fetch the shard count recommended by Discord."""
+    rest = hikari.RESTApp()
+    await rest.start()
+    try:
+        async with rest.acquire(CONFIG.TOKEN, hikari.TokenType.BOT) as client:
+            return (await client.fetch_gateway_bot_info()).shard_count
+    finally:
+        await rest.close()
+
+
+def _worker_main(
+    shard_ids: list[int],
+    shard_count: int,
+    heartbeat: multiprocessing.sharedctypes.Synchronized[float],
+    heartbeat_interval: float,
+) -> None:
+    bot = app.build()
+    tasks: list[asyncio.Task[t.NoReturn]] = []
+
+    async def beat() -> t.NoReturn:
+        while True:
+            # A worker is only healthy if every shard it owns is connected.
+            if all(shard.is_alive for shard in bot.shards.values()):
+                heartbeat.value = time.time()
+            await asyncio.sleep(heartbeat_interval)
+
+    async def on_started(_: hikari.StartedEvent) -> None:
+        tasks.append(asyncio.create_task(beat()))
+
+    bot.subscribe(hikari.StartedEvent, on_started)
+
+    app.run(bot, shard_ids=shard_ids, shard_count=shard_count)
+
+
+class _Worker:
+    def __init__(
+        self,
+        index: int,
+        *,
+        shard_ids: list[int],
+        shard_count: int,
+        heartbeat_interval: float,
+    ) -> None:
+        self.index = index
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.heartbeat_interval = heartbeat_interval
+
+        self.heartbeat: multiprocessing.sharedctypes.Synchronized[
+            float
+        ] = _CONTEXT.Value("d", 0.0)
+        """Time of the last heartbeat. `0` until the worker is ready."""
+        self.process: multiprocessing.process.BaseProcess | None = None
+        self.started_at = 0.0
+        self.failures = 0
+        """Amount of times in a row the worker had to be restarted."""
+
+    def __str__(self) -> str:
+        return f"worker {self.index} (shards {self.shard_ids[0]}-{self.shard_ids[-1]})"
+
+    @property
+    def is_alive(self) -> bool:
+        return bool(self.process and self.process.is_alive())
+
+    @property
+    def is_ready(self) -> bool:
+        return self.heartbeat.value > 0
+
+    def is_healthy(self, *, heartbeat_timeout: float, startup_timeout: float) -> bool:
+        if not self.is_alive:
+            return False
+
+        now = time.time()
+        if not self.is_ready:
+            return now - self.started_at < startup_timeout
+        return now - self.heartbeat.value < heartbeat_timeout
+
+    def start(self) -> None:
+        self.heartbeat.value = 0.0
+        self.started_at = time.time()
+        self.process = _CONTEXT.Process(
+            target=_worker_main,
+            args=(
+                self.shard_ids,
+                self.shard_count,
+                self.heartbeat,
+                self.heartbeat_interval,
+            ),
+            name=f"io-worker-{self.index}",
+        )
+        self.process.start()
+
+    def terminate(self) -> None:
+        # hikari closes the gateway gracefully on SIGTERM.
+        if self.process:
+            self.process.terminate()
+
+    def join(self, timeout: float) -> None:
+        """Wait up to `timeout` seconds for the worker to exit, then kill it."""
+        if not self.process:
+            return
+
+        self.process.join(max(0, timeout))
+
+        if self.process.is_alive():
+            LOG.warning(f"{self} did not stop in time, killing it.")
+            self.process.kill()
+            self.process.join()
+
+        self.process = None
+
+    def stop(self, timeout: float) -> None:
+        self.terminate()
+        self.join(timeout)
+
+
+class Supervisor:
+    """Starts the workers, checks their health and restarts them when needed."""
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        shard_count: int | None = None,
+        heartbeat_interval: float = 10,
+        heartbeat_timeout: float = 60,
+        startup_timeout: float = 300,
+        stop_timeout: float = 30,
+        check_interval: float = 5,
+    ) -> None:
+        self.worker_count = workers
+        self.shard_count = shard_count
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.startup_timeout = startup_timeout
+        self.stop_timeout = stop_timeout
+        self.check_interval = check_interval
+
+        self.workers: list[_Worker] = []
+        self._stopping = False
+        self._rolling_restart = False
+
+    def run(self) -> None:
+        shard_count = self.shard_count or asyncio.run(fetch_shard_count())
+
+        self.workers = [
+            _Worker(
+                index,
+                shard_ids=shard_ids,
+                shard_count=shard_count,
+                heartbeat_interval=self.heartbeat_interval,
+            )
+            for index, shard_ids in enumerate(
+                split_shards(shard_count, self.worker_count)
+            )
+        ]
+
+        print(
+            f"Starting {len(self.workers)} workers for {shard_count} shards"
+            f" (version {CONFIG.VERSION})..."
+        )
+
+        signal.signal(signal.SIGTERM, self._on_stop_signal)
+        signal.signal(signal.SIGINT, self._on_stop_signal)
+        signal.signal(signal.SIGHUP, self._on_restart_signal)
+
+        # Workers are started one at a time so they don't fight over the identify
+        # rate limit.
+        for worker in self.workers:
+            self._start_and_wait(worker)
+
+        while not self._stopping:
+            time.sleep(self.check_interval)
+
+            if self._rolling_restart:
+                self._rolling_restart = False
+                self.rolling_restart()
+
+            for worker in self.workers:
+                if self._stopping:
+                    break
+                if not worker.is_healthy(
+                    heartbeat_timeout=self.heartbeat_timeout,
+                    startup_timeout=self.startup_timeout,
+                ):
+                    LOG.warning(f"{worker} is unhealthy, restarting it.")
+                    self._restart(worker)
+
+        # Every worker drains at the same time, so they share one deadline.
+        for worker in self.workers:
+            worker.terminate()
+        deadline = time.monotonic() + self.stop_timeout
+        for worker in self.workers:
+            worker.join(deadline - time.monotonic())
+
+    def rolling_restart(self) -> None:
+        """Restart every worker one after another."""
+        for worker in self.workers:
+            if self._stopping:
+                return
+            print(f"Restarting {worker}...")
+            worker.failures = 0
+            self._restart(worker)
+
+    def _restart(self, worker: _Worker) -> None:
+        worker.stop(self.stop_timeout)
+
+        if worker.failures:
+            # Back off if a worker keeps crashing.
+            time.sleep(min(2**worker.failures, 300))
+
+        self._start_and_wait(worker)
+
+    def _start_and_wait(self, worker: _Worker) -> None:
+        worker.start()
+
+        while not self._stopping and worker.is_alive and not worker.is_ready:
+            if time.time() - worker.started_at > self.startup_timeout:
+                break
+            time.sleep(1)
+
+        if worker.is_ready:
+            worker.failures = 0
+        else:
+            worker.failures += 1
+
+    def _on_stop_signal(self, signum: int, _: types.FrameType | None) -> None:
+        print(f"Received {signal.Signals(signum).name}, stopping workers...")
+        self._stopping = True
+
+    def _on_restart_signal(self, _signum: int, _frame: types.FrameType | None) -> None:
+        self._rolling_restart = True
@@ -1,8 +1,56 @@
 import os
+import typing as t
 
 import dotenv
 import hikari
 
+from bot.quotas import Quota
+
+
+class BackendConfig(t.NamedTuple):
+    url: str
+    weight: float = 1
+    langs: frozenset[str] | None = None
+    """Languages the backend is limited to. `None` if it runs every language."""
+
+
+def parse_backends(value: str) -> list[BackendConfig]:
+    """
+    Parse a list of backends separated by `;`. Each backend is a URL followed by
+    optional `weight=<number>` and `langs=<lang>,<lang>` options. Blank entries are
+    skipped, so the list can end with `;`.
+
+    `https://a.example/api/ weight=2; https://b.example/api/ langs=python,rust`
+    """
+    backends: list[BackendConfig] = []
+
+    for entry in value.split(";"):
+        if not entry.strip():
+            continue
+
+        url, *options = entry.split()
+        weight = 1.0
+        langs: frozenset[str] | None = None
+
+        for option in options:
+            key, _, option_value = option.partition("=")
+            match key:
+                case "weight":
+                    weight = float(option_value)
+                    if not weight > 0:
+                        raise ValueError(f"The weight of `{url}` has to be positive.")
+                case "langs":
+                    langs = frozenset(option_value.split(","))
+                case _:
+                    raise ValueError(f"Unknown backend option `{key}` for `{url}`.")
+
+        backends.append(BackendConfig(url=url, weight=weight, langs=langs))
+
+    if not backends:
+        raise ValueError("At least one backend is needed.")
+
+    return backends
+
 
 class Config:
     def __init__(self) -> None:
@@ -16,11 +64,19 @@ class Config:
         self.NAME = env["NAME"]
         self.PREFIX = env["PREFIX"]
 
-        self.GODBOLT = env["GODBOLT"]
-        self.PISTON = env["PISTON"]
+        self._load_providers(env)
         self.OWNER_GUILD = int(env["OWNER_GUILD"])
 
+        # `lean` only receives and caches what the commands use, `full` receives every
+        # unprivileged event and uses hikari's default cache.
+        self.GATEWAY_PROFILE = env.get("GATEWAY_PROFILE") or "lean"
+        if self.GATEWAY_PROFILE not in ("lean", "full"):
+            raise ValueError(f"Unknown gateway profile `{self.GATEWAY_PROFILE}`.")
+
         self.LOADING_EMOJI = hikari.Emoji.parse(env["LOADING_EMOJI"])
+        # Seconds a command runs before the loading emoji is added. Faster commands
+        # never show it.
+        self.LOADING_DELAY = float(env.get("LOADING_DELAY") or 1)
         self.REPO_LINK = env["REPO_LINK"]
         self.INVITE_LINK = env["INVITE_LINK"]
 
@@ -29,6 +85,74 @@ class Config:
         self.DATABASE_HOST = env["DATABASE_HOST"]
         self.DATABASE_USER = env["DATABASE_USER"]
         self.DATABASE_PASSWORD = env["DATABASE_PASSWORD"]
+        self.DATABASE_POOL_MIN = int(env.get("DATABASE_POOL_MIN") or 2)
+        self.DATABASE_POOL_MAX = int(env.get("DATABASE_POOL_MAX") or 20)
+
+        # Amount of processes to split the shards between. `1` runs a single process.
+        self.CLUSTER_WORKERS = int(env.get("CLUSTER_WORKERS") or 1)
+        # Leave unset to use the shard count recommended by Discord.
+        self.SHARD_COUNT = int(env["SHARD_COUNT"]) if env.get("SHARD_COUNT") else None
+
+        # Maximum amount of guilds whose prefixes are kept in memory.
+        self.PREFIX_CACHE_SIZE = int(env.get("PREFIX_CACHE_SIZE") or 10000)
+        # Load every guild's prefixes on startup instead of on first use.
+        self.PREFIX_PRELOAD = (env.get("PREFIX_PRELOAD") or "false").lower() == "true"
+
+        # Show the output of Piston runs while they are running. The backends have to
+        # support Piston's WebSocket API.
+        self.STREAM_OUTPUT = (env.get("STREAM_OUTPUT") or "false").lower() == "true"
+        # Seconds between edits of a message showing output as it arrives.
+        self.STREAM_EDIT_INTERVAL = float(env.get("STREAM_EDIT_INTERVAL") or 2)
+
+        # Runs a user or guild can make at once, and how many the quota refills by
+        # every minute. A burst of `0` disables the quota. Guilds can be given other
+        # quotas in the `guild_quotas` table.
+        self.USER_QUOTA = Quota(
+            burst=float(env.get("USER_QUOTA_BURST") or 5),
+            per_minute=float(env.get("USER_QUOTA_PER_MINUTE") or 10),
+        )
+        self.GUILD_QUOTA = Quota(
+            burst=float(env.get("GUILD_QUOTA_BURST") or 30),
+            per_minute=float(env.get("GUILD_QUOTA_PER_MINUTE") or 60),
+        )
+        for quota in (self.USER_QUOTA, self.GUILD_QUOTA):
+            if quota.burst > 0 and quota.per_minute <= 0:
+                raise ValueError("Quotas have to refill by a positive amount.")
+
+        # Record every run in the `executions` table, and delete records older than
+        # HISTORY_RETENTION_DAYS.
+        self.EXECUTION_HISTORY = (
+            env.get("EXECUTION_HISTORY") or "true"
+        ).lower() == "true"
+        self.HISTORY_RETENTION_DAYS = float(env.get("HISTORY_RETENTION_DAYS") or 30)
+
+        # Seconds the bot is given to stop, and the part of them runs in flight are
+        # given to finish. Pending tasks get what is left of STOP_TIMEOUT.
+        self.STOP_TIMEOUT = float(env.get("STOP_TIMEOUT") or 25)
+        self.DRAIN_TIMEOUT = float(env.get("DRAIN_TIMEOUT") or 20)
+        if self.DRAIN_TIMEOUT >= self.STOP_TIMEOUT:
+            raise ValueError("DRAIN_TIMEOUT has to be shorter than STOP_TIMEOUT.")
+
+        # `memory` or `postgres`
+        self.STATE_BACKEND = env.get("STATE_BACKEND") or "memory"
+
+    def _load_providers(self, env: t.Mapping[str, str]) -> None:
+        # Everything is parsed before anything is assigned, so invalid settings
+        # leave the current ones untouched.
+        godbolt = parse_backends(env["GODBOLT"])
+        piston = parse_backends(env["PISTON"])
+        # Fraction of requests that may be duplicated to a second backend when they
+        # are slower than usual. `0` disables hedging.
+        hedge_budget = float(env.get("HEDGE_BUDGET") or 0)
+
+        self.GODBOLT, self.PISTON, self.HEDGE_BUDGET = godbolt, piston, hedge_budget
+
+    def reload_providers(self) -> None:
+        """Read the provider settings again. Values in `.env` take priority."""
+        values = dotenv.dotenv_values()
+        self._load_providers(
+            {**os.environ, **{k: v for k, v in values.items() if v is not None}}
+        )
 
 
 CONFIG = Config()
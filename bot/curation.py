@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import typing as t
+
+if t.TYPE_CHECKING:
+    from bot.version_manager import Language
+
+__all__: list[str] = ["curate", "latest_of_type"]
+
+
+def latest_of_type(langs: list[Language], name: str, amount: int) -> list[Language]:
+    """`langs` is a sorted list."""
+    out: list[Language] = []
+
+    for lang in langs:
+        if lang.full_name.startswith(name):
+            out += [lang]
+
+        if len(out) == amount:
+            break
+
+    return out
+
+
+def curate(langs: dict[str, list[Language]]) -> None:
+    """
+    Pick the versions of each language that are offered. Every list of versions is
+    sorted newest first.
+
+    This module can be reloaded while the bot runs, so rules can be changed without
+    a restart.
+    """
+    # Because there are so many C/++ versions only a few are selected.
+
+    # fmt: off
+    langs["c"] = latest_of_type(
+        langs["c"], "x86-64 clang", 2,
+    ) + latest_of_type(
+        langs["c"], "x86-64 gcc", 2,
+    ) + latest_of_type(
+        langs["c"], "x86-64 icx", 1,
+    ) + latest_of_type(
+        langs["c"], "x86-64 icc", 1,
+    )
+
+    langs["c++"] = latest_of_type(
+        langs["c++"], "x86-64 clang", 2,
+    ) + latest_of_type(
+        langs["c++"], "x86-64 gcc", 2,
+    ) + latest_of_type(
+        langs["c++"], "x86-64 icx", 1,
+    ) + latest_of_type(
+        langs["c++"], "x86-64 icc", 1,
+    )
+    # fmt: on
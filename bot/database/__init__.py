@@ -1,4 +1,15 @@
 from bot.database.database import Database
-from bot.database.models import Prefixes
+from bot.database.history import Execution, ExecutionHistory
+from bot.database.models import Executions, GuildQuotas, MessageState, Prefixes
+from bot.database.prefix_cache import PrefixCache
 
-__all__: list[str] = ["Database", "Prefixes"]
+__all__: list[str] = [
+    "Database",
+    "Execution",
+    "ExecutionHistory",
+    "Executions",
+    "GuildQuotas",
+    "MessageState",
+    "PrefixCache",
+    "Prefixes",
+]
@@ -1,12 +1,97 @@
+import contextlib
+import datetime
+import hashlib
+import pathlib
+import time
 import typing as t
 
 import apgorm
 
-from bot.database.models import Prefixes
+from bot import profiling
+from bot.database.models import Executions, GuildQuotas, MessageState, Prefixes
+from bot.database.stats import QueryStats
+from bot.quotas import Quota, QuotaOverride
+
+__all__: list[str] = ["PREFIX_NOTIFY_CHANNEL", "Database"]
+
+PREFIX_NOTIFY_CHANNEL = "prefixes"
+"""Postgres channel that guild IDs are sent on when their prefixes change."""
+
+# Each write is a single statement, so it is atomic without a transaction. The
+# notification is sent when the statement commits, and only if a row changed.
+_ADD_PREFIX = f"""
+WITH changed AS (
+    INSERT INTO prefixes (guild_id, prefixes) VALUES ($1, ARRAY[$2::VARCHAR(32)])
+    ON CONFLICT (guild_id) DO UPDATE
+        SET prefixes = array_append(prefixes.prefixes, $2::VARCHAR(32))
+        WHERE NOT $2::VARCHAR(32) = ANY(prefixes.prefixes)
+    RETURNING guild_id
+)
+SELECT changed.guild_id FROM changed,
+    LATERAL (SELECT pg_notify('{PREFIX_NOTIFY_CHANNEL}', changed.guild_id::TEXT)) n
+"""
+
+_REMOVE_PREFIX = f"""
+WITH changed AS (
+    UPDATE prefixes SET prefixes = array_remove(prefixes, $2::VARCHAR(32))
+    WHERE guild_id = $1 AND $2::VARCHAR(32) = ANY(prefixes)
+    RETURNING guild_id
+)
+SELECT changed.guild_id FROM changed,
+    LATERAL (SELECT pg_notify('{PREFIX_NOTIFY_CHANNEL}', changed.guild_id::TEXT)) n
+"""
+
+_FETCH_PREFIXES = "SELECT prefixes FROM prefixes WHERE guild_id = $1"
+
+_FETCH_QUOTAS = """
+SELECT user_burst, user_per_minute, guild_burst, guild_per_minute FROM guild_quotas
+WHERE guild_id = $1
+"""
+
+# Rollups of the execution history. `cache_hit` and `exit_code` are averaged as
+# integers to get rates.
+_BUSIEST_RUNTIMES = """
+SELECT language, version, provider, count(*) AS runs,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY latency) AS median_latency,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY latency) AS p95_latency,
+    avg(cache_hit::INT) AS cache_hit_rate,
+    avg((exit_code IS NULL)::INT) AS error_rate
+FROM executions WHERE ran_at > now() - $1::INTERVAL
+GROUP BY language, version, provider
+ORDER BY runs DESC LIMIT $2
+"""
+
+_BUSIEST_SNIPPETS = """
+SELECT code_hash, language, count(*) AS runs, max(code_size) AS code_size,
+    avg(cache_hit::INT) AS cache_hit_rate
+FROM executions WHERE ran_at > now() - $1::INTERVAL
+GROUP BY code_hash, language HAVING count(*) > 1
+ORDER BY runs DESC LIMIT $2
+"""
+
+_PRUNE_EXECUTIONS = "DELETE FROM executions WHERE ran_at < now() - $1::INTERVAL"
+
+# The fingerprint of the applied schema is stored as a comment on the migrations
+# table, so checking it is a single query that also works before the table exists.
+_FETCH_FINGERPRINT = "SELECT obj_description(to_regclass('_migrations'), 'pg_class')"
 
 
 class Database(apgorm.Database):
     prefixes = Prefixes
+    guild_quotas = GuildQuotas
+    executions = Executions
+    message_state = MessageState
+
+    indexes = [
+        # Rollups only read recent rows of an append-only table, which BRIN indexes
+        # cover at a fraction of the size of a BTREE.
+        apgorm.Index(Executions, Executions.ran_at, apgorm.IndexType.BRIN),
+        apgorm.Index(MessageState, MessageState.expires_at),
+    ]
+
+    def __init__(self, migrations_folder: str) -> None:
+        super().__init__(migrations_folder)
+        self.stats = QueryStats()
 
     @classmethod
     async def open(
@@ -17,7 +102,10 @@ class Database(apgorm.Database):
         port: int,
         database: str,
         user: str,
-        password: str
+        password: str,
+        min_pool_size: int = 2,
+        max_pool_size: int = 20,
+        statement_cache_size: int = 100,
     ) -> t.Self:
         self = cls(migrations_folder)
         await self.connect(
@@ -26,11 +114,147 @@ class Database(apgorm.Database):
             user=user,
             password=password,
             port=port,
+            min_size=min_pool_size,
+            max_size=max_pool_size,
+            statement_cache_size=statement_cache_size,
         )
 
+        with profiling.phase("migrations"):
+            await self._migrate(migrations_folder)
+
+        return self
+
+    async def _migrate(self, migrations_folder: str) -> None:
+        fingerprint = self._schema_fingerprint(migrations_folder)
+
+        if await self.query_val("fetch_fingerprint", _FETCH_FINGERPRINT) == fingerprint:
+            return
+
         if self.must_create_migrations():
             self.create_migrations()
+            # Creating a migration changes the folder.
+            fingerprint = self._schema_fingerprint(migrations_folder)
         if await self.must_apply_migrations():
             await self.apply_migrations()
 
-        return self
+        await self.query_execute(
+            "store_fingerprint", f"COMMENT ON TABLE _migrations IS '{fingerprint}'"
+        )
+
+    def _schema_fingerprint(self, migrations_folder: str) -> str:
+        """Hash of the models and every migration in the migrations folder."""
+        digest = hashlib.sha256(self.describe().json().encode())
+
+        for path in sorted(pathlib.Path(migrations_folder).glob("*/migrations.sql")):
+            digest.update(str(path.parent.name).encode())
+            digest.update(path.read_bytes())
+
+        return digest.hexdigest()
+
+    @contextlib.asynccontextmanager
+    async def _timed(self, name: str) -> t.AsyncGenerator[t.Any, None]:
+        assert self.pool, "Database has not been started"
+        start = time.perf_counter()
+        try:
+            async with self.pool.acquire() as con:
+                yield con.con
+        finally:
+            self.stats.record(name, time.perf_counter() - start)
+
+    async def query_val(self, name: str, query: str, *args: t.Any) -> t.Any:
+        """
+        Run a single statement and return the first value.
+
+        Unlike `fetchval`, no transaction is opened, so this is one round trip.
+        asyncpg prepares the statement once per connection and reuses it from the
+        connection's statement cache.
+        """
+        async with self._timed(name) as con:
+            return await con.fetchval(query, *args)
+
+    async def query_row(
+        self, name: str, query: str, *args: t.Any
+    ) -> t.Mapping[str, t.Any] | None:
+        """Run a single statement and return the first row."""
+        async with self._timed(name) as con:
+            return await con.fetchrow(query, *args)
+
+    async def query_rows(
+        self, name: str, query: str, *args: t.Any
+    ) -> list[t.Mapping[str, t.Any]]:
+        """Run a single statement and return every row."""
+        async with self._timed(name) as con:
+            return await con.fetch(query, *args)
+
+    async def query_execute(self, name: str, query: str, *args: t.Any) -> None:
+        """Run a single statement."""
+        async with self._timed(name) as con:
+            await con.execute(query, *args)
+
+    async def copy_records(
+        self, name: str, table: str, records: t.Sequence[t.NamedTuple]
+    ) -> None:
+        """
+        Insert rows with a single `COPY`. The fields of the records are the columns.
+        """
+        if not records:
+            return
+
+        async with self._timed(name) as con:
+            await con.copy_records_to_table(
+                table, columns=records[0]._fields, records=records
+            )
+
+    async def fetch_prefixes(self, guild_id: int) -> list[str]:
+        return list(
+            await self.query_val("fetch_prefixes", _FETCH_PREFIXES, guild_id) or []
+        )
+
+    async def add_prefix(self, guild_id: int, prefix: str) -> bool:
+        """Add a prefix to a guild. Returns `False` if the guild already had it."""
+        return (
+            await self.query_val("add_prefix", _ADD_PREFIX, guild_id, prefix)
+            is not None
+        )
+
+    async def remove_prefix(self, guild_id: int, prefix: str) -> bool:
+        """Remove a prefix from a guild. Returns `False` if the guild didn't have it."""
+        return (
+            await self.query_val("remove_prefix", _REMOVE_PREFIX, guild_id, prefix)
+            is not None
+        )
+
+    async def fetch_quotas(self, guild_id: int) -> QuotaOverride | None:
+        """A guild's quota overrides, or `None` if it has none."""
+        row = await self.query_row("fetch_quotas", _FETCH_QUOTAS, guild_id)
+        if not row:
+            return None
+
+        def quota(burst: float | None, per_minute: float | None) -> Quota | None:
+            # A quota that never refills is treated as unset.
+            if burst is None or per_minute is None or per_minute <= 0:
+                return None
+            return Quota(burst=burst, per_minute=per_minute)
+
+        return QuotaOverride(
+            user=quota(row["user_burst"], row["user_per_minute"]),
+            guild=quota(row["guild_burst"], row["guild_per_minute"]),
+        )
+
+    async def busiest_runtimes(
+        self, since: datetime.timedelta, limit: int = 10
+    ) -> list[t.Mapping[str, t.Any]]:
+        return await self.query_rows(
+            "busiest_runtimes", _BUSIEST_RUNTIMES, since, limit
+        )
+
+    async def busiest_snippets(
+        self, since: datetime.timedelta, limit: int = 10
+    ) -> list[t.Mapping[str, t.Any]]:
+        """Code that was run more than once, by how often."""
+        return await self.query_rows(
+            "busiest_snippets", _BUSIEST_SNIPPETS, since, limit
+        )
+
+    async def prune_executions(self, older_than: datetime.timedelta) -> None:
+        await self.query_execute("prune_executions", _PRUNE_EXECUTIONS, older_than)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import datetime
+import logging
+import time
+import typing as t
+
+from bot.database.database import Database
+
+__all__: list[str] = ["Execution", "ExecutionHistory"]
+
+LOG = logging.getLogger(__file__)
+
+PRUNE_INTERVAL = 3600
+"""Seconds between deletions of executions older than the retention."""
+
+
+class Execution(t.NamedTuple):
+    """A row of the `executions` table, in column order."""
+
+    ran_at: datetime.datetime
+    kind: str
+    """`execute` or `compile`."""
+    language: str
+    version: str
+    provider: str
+    code_hash: bytes
+    code_size: int
+    output_size: int
+    latency: float
+    """Seconds until the result was returned, including fallbacks."""
+    exit_code: int | None
+    """`None` if the provider returned an error instead of a result."""
+    cache_hit: bool
+
+
+class ExecutionHistory:
+    """
+    Records executions in the database without making runs wait on it.
+
+    Executions are buffered in memory and written in batches with `COPY`, once
+    `batch_size` are buffered or every `interval` seconds. If the database falls
+    behind and `max_buffer` executions are waiting, new ones are dropped.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        *,
+        retention: datetime.timedelta,
+        batch_size: int = 500,
+        interval: float = 10,
+        max_buffer: int = 10000,
+    ) -> None:
+        self.db = db
+        self.retention = retention
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_buffer = max_buffer
+
+        self._buffer: list[Execution] = []
+        self._full = asyncio.Event()
+        self._last_prune = 0.0
+
+        self.written = 0
+        self.dropped = 0
+
+    def record(self, execution: Execution) -> None:
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            return
+
+        self._buffer.append(execution)
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+
+    async def run(self) -> t.NoReturn:
+        """Write the buffer whenever it fills up or `interval` passes."""
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.interval)
+            except TimeoutError:
+                pass
+
+            await self.flush()
+
+            if time.monotonic() - self._last_prune >= PRUNE_INTERVAL:
+                self._last_prune = time.monotonic()
+                await self.db.prune_executions(self.retention)
+
+    async def flush(self) -> None:
+        self._full.clear()
+        while batch := self._buffer[: self.batch_size]:
+            del self._buffer[: self.batch_size]
+
+            try:
+                await self.db.copy_records("write_executions", "executions", batch)
+            except BaseException as e:
+                # The batch is kept for the next flush, unless the buffer filled up
+                # in the meantime.
+                kept = batch[: max(0, self.max_buffer - len(self._buffer))]
+                self._buffer[:0] = kept
+                self.dropped += len(batch) - len(kept)
+                if isinstance(e, Exception):
+                    LOG.exception(e)
+                    return
+                raise
+
+            self.written += len(batch)
+
+    async def close(self) -> None:
+        """Write what is left in the buffer."""
+        try:
+            await self.flush()
+        except Exception as e:
+            LOG.exception(e)
+
+        if self._buffer:
+            LOG.warning(f"Dropped {len(self._buffer)} executions that weren't written.")
@@ -2,7 +2,6 @@ import typing as t
 
 import apgorm
 import apgorm.types
-import hikari
 
 
 class StringListConverter(apgorm.Converter[t.Sequence[str | None], list[str]]):
@@ -24,21 +23,55 @@ class Prefixes(apgorm.Model):
 
     primary_key = (guild_id,)
 
-    @staticmethod
-    async def create_prefix(guild_id: hikari.Snowflake, prefix: str) -> None:
-        if prefix_obj := await Prefixes(guild_id=guild_id).exists():
-            the_list = prefix_obj.prefixes
-            the_list.append(prefix)
-            prefix_obj.prefixes = the_list
-            await prefix_obj.save()
-            return
-
-        await Prefixes(guild_id=guild_id, prefixes=[prefix]).create()
-
-    @staticmethod
-    async def remove_prefix(guild_id: hikari.Snowflake, prefix: str) -> None:
-        prefix_obj = await Prefixes.fetch(guild_id=guild_id)
-        the_list = prefix_obj.prefixes
-        the_list.remove(prefix)
-        prefix_obj.prefixes = the_list
-        await prefix_obj.save()
+
+@t.final
+class GuildQuotas(apgorm.Model):
+    """
+    A guild's run quotas. A quota is only overridden if both of its columns are set.
+    """
+
+    guild_id = apgorm.types.BigInt().field()
+    user_burst = apgorm.types.Real().nullablefield()
+    user_per_minute = apgorm.types.Real().nullablefield()
+    guild_burst = apgorm.types.Real().nullablefield()
+    guild_per_minute = apgorm.types.Real().nullablefield()
+
+    primary_key = (guild_id,)
+
+
+@t.final
+class Executions(apgorm.Model):
+    """Every code run and asm inspection, written in batches by `ExecutionHistory`."""
+
+    id = apgorm.types.BigSerial().field()
+    ran_at = apgorm.types.TimestampTZ().field()
+    kind = apgorm.types.VarChar(16).field()
+    language = apgorm.types.VarChar(64).field()
+    version = apgorm.types.VarChar(64).field()
+    provider = apgorm.types.VarChar(16).field()
+    code_hash = apgorm.types.ByteA().field()
+    code_size = apgorm.types.Int().field()
+    output_size = apgorm.types.Int().field()
+    latency = apgorm.types.Real().field()
+    exit_code = apgorm.types.Int().nullablefield()
+    cache_hit = apgorm.types.Boolean().field()
+
+    primary_key = (id,)
+
+
+@t.final
+class MessageState(apgorm.Model):
+    """
+    Message state of `PostgresState`. The table is unlogged, see migration `0003`.
+    """
+
+    namespace = apgorm.types.Text().field()
+    message_id = apgorm.types.BigInt().field()
+    linked_id = apgorm.types.BigInt().nullablefield()
+    user_id = apgorm.types.BigInt().nullablefield()
+    guild_id = apgorm.types.BigInt().nullablefield()
+    content = apgorm.types.Text().nullablefield()
+    expires_at = apgorm.types.TimestampTZ().field()
+
+    # Every row of a message is read at once, so the message ID comes first.
+    primary_key = (message_id, namespace)
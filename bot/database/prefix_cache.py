@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import typing as t
+
+import cachetools
+import hikari
+
+from bot.database.database import PREFIX_NOTIFY_CHANNEL, Database
+from bot.database.models import Prefixes
+from bot.tasks import TaskSupervisor
+
+__all__: list[str] = ["PrefixCache"]
+
+LOG = logging.getLogger(__file__)
+
+
+class PrefixCache:
+    """
+    Lazily loaded guild prefixes.
+
+    Guilds are loaded the first time they are looked up and kept in a bounded LRU.
+    Guilds without prefixes are cached too, so they only cost one query. Every
+    instance listens on `PREFIX_NOTIFY_CHANNEL` and drops a guild when it changes.
+    """
+
+    def __init__(self, db: Database, *, maxsize: int = 10000) -> None:
+        self.db = db
+        self._cache: cachetools.LRUCache[int, tuple[str, ...]] = cachetools.LRUCache(
+            maxsize=maxsize
+        )
+        self._generation = 0
+        """Incremented on every invalidation so in-flight loads don't cache stale rows."""
+        self._listener: asyncio.Task[t.NoReturn] | None = None
+
+    async def start(self, tasks: TaskSupervisor, *, preload: bool = False) -> None:
+        if preload:
+            for prefix in await Prefixes.fetchmany():
+                self._cache[prefix.guild_id] = tuple(prefix.prefixes)
+
+        self._listener = tasks.supervise(self._listen, name="prefix listener")
+
+    async def close(self) -> None:
+        if not self._listener:
+            return
+
+        self._listener.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._listener
+        self._listener = None
+
+    async def get(self, guild_id: hikari.Snowflake) -> tuple[str, ...]:
+        """Return the prefixes for a guild."""
+        if (prefixes := self._cache.get(guild_id)) is not None:
+            return prefixes
+
+        generation = self._generation
+        prefixes = tuple(await self.db.fetch_prefixes(guild_id))
+
+        if generation == self._generation:
+            self._cache[guild_id] = prefixes
+
+        return prefixes
+
+    def invalidate(self, guild_id: hikari.Snowflake) -> None:
+        """
+        Drop a guild from this instance's cache. Other instances are notified by the
+        database when the prefixes are written.
+        """
+        self._drop(guild_id)
+
+    def _drop(self, guild_id: int) -> None:
+        self._generation += 1
+        self._cache.pop(guild_id, None)
+
+    async def _listen(self) -> t.NoReturn:
+        while True:
+            lost = asyncio.Event()
+
+            try:
+                assert self.db.pool
+                # The connection is held for as long as it is alive. Releasing it
+                # back to the pool unlistens automatically.
+                async with self.db.pool.acquire() as con:
+                    listener: t.Any = con.con
+                    await listener.add_listener(PREFIX_NOTIFY_CHANNEL, self._on_notify)
+
+                    def on_terminate(_con: t.Any) -> None:
+                        lost.set()
+
+                    listener.add_termination_listener(on_terminate)
+                    await lost.wait()
+            except Exception as e:
+                LOG.exception(e)
+
+            # Notifications may have been missed, so nothing in the cache can be
+            # trusted.
+            LOG.warning("Lost the prefix listener connection, reconnecting.")
+            self._generation += 1
+            self._cache.clear()
+            await asyncio.sleep(5)
+
+    def _on_notify(
+        self, _con: t.Any, _pid: int, _channel: str, payload: object
+    ) -> None:
+        self._drop(int(str(payload)))
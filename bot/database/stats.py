@@ -0,0 +1,33 @@
+import dataclasses
+import typing as t
+
+__all__: list[str] = ["QueryStat", "QueryStats"]
+
+
+@dataclasses.dataclass(slots=True)
+class QueryStat:
+    count: int = 0
+    total: float = 0
+    max: float = 0
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0
+
+
+class QueryStats:
+    """Latency of named queries, including the time spent waiting for a connection."""
+
+    def __init__(self) -> None:
+        self.queries: dict[str, QueryStat] = {}
+
+    def record(self, name: str, elapsed: float) -> None:
+        stat = self.queries.setdefault(name, QueryStat())
+        stat.count += 1
+        stat.total += elapsed
+        stat.max = max(stat.max, elapsed)
+
+    def __iter__(self) -> t.Iterator[tuple[str, QueryStat]]:
+        return iter(
+            sorted(self.queries.items(), key=lambda x: x[1].total, reverse=True)
+        )
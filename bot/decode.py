@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import typing as t
+
+import orjson
+from result import Err, Ok, Result
+
+__all__: list[str] = ["ShapeError", "decode", "field", "optional_field", "parse"]
+
+T = t.TypeVar("T")
+
+
+class ShapeError(ValueError):
+    """A response was valid JSON, but not shaped like the provider's API."""
+
+
+def field(payload: t.Any, key: str, type_: type[T]) -> T:
+    """Get a field of a JSON object, checking that it has the expected type."""
+    # Indexing first keeps the common case to one lookup and one type check.
+    try:
+        value = payload[key]
+    except KeyError:
+        raise ShapeError(f"`{key}` is missing.") from None
+    except TypeError:
+        raise ShapeError(
+            f"Expected an object with `{key}`, got {_name(payload)}."
+        ) from None
+
+    if not isinstance(value, type_):
+        raise ShapeError(f"`{key}` should be {type_.__name__}, got {_name(value)}.")
+    return value
+
+
+def optional_field(payload: t.Any, key: str, type_: type[T]) -> T | None:
+    """Like `field`, but the field may be missing or `null`."""
+    if isinstance(payload, dict) and t.cast(dict[str, t.Any], payload).get(key) is None:
+        return None
+    return field(payload, key, type_)
+
+
+def parse(body: bytes | str, parser: t.Callable[[t.Any], T]) -> T:
+    """
+    Decode a JSON response with orjson and build models from it with `parser`.
+    Raises `ShapeError` if the response isn't valid JSON or isn't shaped right.
+    """
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise ShapeError(f"The response isn't valid JSON: {e}") from None
+
+    try:
+        return parser(payload)
+    except ShapeError:
+        raise
+    except (AttributeError, KeyError, TypeError) as e:
+        # Raised by parsers that index nested payloads directly.
+        raise ShapeError(f"The response has an unexpected shape: {e!r}") from None
+
+
+def decode(body: bytes | str, parser: t.Callable[[t.Any], T]) -> Result[T, str]:
+    """Like `parse`, but shape errors are returned as `Err`."""
+    try:
+        return Ok(parse(body, parser))
+    except ShapeError as e:
+        return Err(f"An unexpected response was received: {e}")
+
+
+def _name(value: object) -> str:
+    return "null" if value is None else type(value).__name__
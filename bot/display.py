@@ -3,7 +3,6 @@ __all__: list[str] = ["EmbedBuilder"]
 import dataclasses
 import typing as t
 
-import dahlia
 import hikari
 
 
@@ -58,6 +57,8 @@ class TextDisplay:
             out += f"\n{self.description}"
 
         if self.error:
+            if out:
+                out += "\n"
             out += f"❌ {self.error}"
 
         if self.code:
@@ -68,6 +69,9 @@ class TextDisplay:
             # Discord doesn't understand this either.
             cleaner = cleaner.replace("\x1b[01m", "\x1b[1m")
 
+            # dahlia is only needed once there is output, so it is imported lazily.
+            import dahlia
+
             try:
                 quantized = dahlia.quantize_ansi(cleaner, to=3)
             except Exception:
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import typing as t
+
+__all__: list[str] = ["Drain"]
+
+
+class Drain:
+    """
+    Keeps count of the runs in flight, so the bot can stop without dropping them.
+
+    Once draining starts, new runs should be turned away while the ones in flight
+    are given time to finish.
+    """
+
+    def __init__(self) -> None:
+        self.draining = False
+        self._running = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @contextlib.asynccontextmanager
+    async def track(self) -> t.AsyncGenerator[None, None]:
+        """Count the body as a run in flight."""
+        self._running += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._running -= 1
+            if not self._running:
+                self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Stop accepting runs and wait up to `timeout` seconds for the ones in flight.
+        Returns `False` if some of them didn't finish in time.
+        """
+        self.draining = True
+
+        try:
+            async with asyncio.timeout(timeout):
+                await self._idle.wait()
+        except TimeoutError:
+            return False
+
+        return True
@@ -34,3 +34,17 @@ def transform_code(lang: str, code: str) -> str:
 
         case _:
             return code
+
+
+def added_lines(lang: str, code: str) -> int:
+    """The amount of lines `transform_code` adds before the code."""
+
+    match lang:
+        case "rust":
+            return 0 if RUST_FN_REGEX.search(code) else 1
+
+        case "zig":
+            return 1
+
+        case _:
+            return 0
@@ -1,3 +1,4 @@
+from bot.godbolt.asm import AsmFilter
 from bot.godbolt.client import Client
 
-__all__: list[str] = ["Client"]
+__all__: list[str] = ["AsmFilter", "Client"]
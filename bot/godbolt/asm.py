@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import dataclasses
+import re
+import typing as t
+
+from result import Err, Ok, Result
+
+__all__: list[str] = ["AsmFilter", "decode_asm"]
+
+_TEMPLATE_ARGS = re.compile(r"<[^<>]*>")
+
+
+def _function_names(label: str) -> tuple[str, str] | None:
+    """
+    The qualified and unqualified name of the function a label starts, or `None` if
+    the line isn't a function label. `int ns::foo<int>(int):` is `ns::foo` and `foo`.
+    """
+    if not label.endswith(":") or label[0] in " \t.":
+        return None
+
+    name = label[:-1].partition("(")[0]
+    # Template arguments can be nested, so the innermost ones are removed first.
+    while (stripped := _TEMPLATE_ARGS.sub("", name)) != name:
+        name = stripped
+    name = name.rsplit(" ", 1)[-1]
+
+    return name, name.rsplit("::", 1)[-1]
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class AsmFilter:
+    """Which parts of the asm to show. A line is shown if any part selects it."""
+
+    functions: frozenset[str] = frozenset()
+    """Functions by qualified or unqualified name."""
+    lines: tuple[tuple[int, int], ...] = ()
+    """Inclusive ranges of source lines."""
+
+    @classmethod
+    def parse(cls, options: t.Mapping[str, str]) -> Result[t.Self | None, str]:
+        """
+        Parse `fn=foo,bar` and `lines=3-10,14` options. Returns `None` if neither is
+        passed.
+        """
+        functions: frozenset[str] = frozenset()
+        lines: list[tuple[int, int]] = []
+
+        for key, value in options.items():
+            match key:
+                case "fn":
+                    functions = frozenset(filter(None, value.split(",")))
+                case "lines":
+                    for part in filter(None, value.split(",")):
+                        start, dash, end = part.partition("-")
+                        if not dash:
+                            end = start
+                        # `3-` and `-5` are ranges missing one of their ends.
+                        if dash and not (start and end):
+                            return Err(f"The range `{part}` ends before it starts.")
+                        if not start.isdigit() or not end.isdigit():
+                            return Err(f"`{part}` is not a line or range of lines.")
+                        if int(start) > int(end):
+                            return Err(f"The range `{part}` ends before it starts.")
+                        lines.append((int(start), int(end)))
+                case _:
+                    return Err(f"Unknown option `{key}`. Use `fn=` or `lines=`.")
+
+        if not functions and not lines:
+            return Ok(None)
+
+        return Ok(cls(functions=functions, lines=tuple(lines)))
+
+    def describe(self) -> str:
+        parts = [f"`{name}`" for name in sorted(self.functions)]
+        parts.extend(
+            f"line {start}" if start == end else f"lines {start}-{end}"
+            for start, end in self.lines
+        )
+        return ", ".join(parts)
+
+    def shifted(self, offset: int) -> t.Self:
+        """The same filter for code that has `offset` more lines before it."""
+        return dataclasses.replace(
+            self,
+            lines=tuple((start + offset, end + offset) for start, end in self.lines),
+        )
+
+    def selects_function(self, names: tuple[str, str]) -> bool:
+        return not self.functions.isdisjoint(names)
+
+    def selects_line(self, line: int) -> bool:
+        return any(start <= line <= end for start, end in self.lines)
+
+
+def decode_asm(items: t.Sequence[t.Any], asm_filter: AsmFilter | None = None) -> str:
+    """
+    Join the `asm` array of a Compiler Explorer response into text, keeping only the
+    lines `asm_filter` selects. Lines are matched to source lines with Compiler
+    Explorer's source mapping. The label of a function is kept with its selected
+    lines, so it is clear where they came from.
+    """
+    if asm_filter is None:
+        return "\n".join(text for item in items if (text := item.get("text")))
+
+    out: list[str] = []
+    # The label of the current function, until a line of it is kept.
+    label: str | None = None
+    # If the whole current function is selected.
+    in_function = False
+
+    for item in items:
+        if not (text := item.get("text")):
+            continue
+
+        if names := _function_names(text):
+            in_function = asm_filter.selects_function(names)
+            if in_function:
+                out.append(text)
+                label = None
+            else:
+                label = text
+            continue
+
+        source = item.get("source")
+        if in_function or (
+            source
+            and source.get("file") is None
+            and (line := source.get("line")) is not None
+            and asm_filter.selects_line(line)
+        ):
+            if label:
+                out.append(label)
+                label = None
+            out.append(text)
+
+    return "\n".join(out)
@@ -1,149 +1,340 @@
+import asyncio
+import dataclasses
+import hashlib
+import logging
 import typing as t
 
-import aiohttp
+import cachetools
 from result import Err, Ok, Result
 
-from bot.config import CONFIG
-from bot.godbolt.models import Compiler, Language
+from bot.backend_pool import Backend, BackendPool, response_error
+from bot.config import BackendConfig
+from bot.decode import decode, field, optional_field, parse
+from bot.godbolt.asm import AsmFilter, decode_asm
+from bot.godbolt.models import (
+    COMPILER_FIELDS,
+    LANGUAGE_FIELDS,
+    Compiler,
+    Language,
+)
+from bot.hedging import HedgePolicy
 from bot.response import ASMResponse, RunResponse
+from bot.tasks import TaskSupervisor
 
 __all__: list[str] = ["Client"]
 
+LOG = logging.getLogger(__file__)
 
-def _get_text_or_none(list: list[dict[str, str]]) -> str | None:
-    if not list:
+ASM_CACHE_SIZE = 256
+ASM_CACHE_TTL = 10 * 60
+"""
+Seconds the asm and the unused run of compiled code are kept, and that a run of code
+whose asm was asked for also generates it.
+"""
+
+
+def _get_text_or_none(payload: t.Any, key: str) -> str | None:
+    """Join the lines of an output field, or `None` if it has none."""
+    if not (lines := t.cast(list[t.Any], field(payload, key, list))):
         return None
 
-    return "\n".join(filter(None, map(lambda x: x.get("text"), list)))
+    return "\n".join(filter(None, (line.get("text") for line in lines)))
+
+
+_ASM_FILTERS = {
+    "binary": False,
+    "binaryObject": False,
+    "commentOnly": True,
+    "demangle": True,
+    "directives": True,
+    "execute": False,
+    "intel": True,
+    "labels": True,
+    "libraryCode": False,
+    "trim": False,
+}
+
+
+_EXECUTE_OPTIONS: dict[str, t.Any] = {
+    # Only the execution result is needed, so no asm or binary is generated.
+    "compilerOptions": {"executorRequest": True, "skipAsm": True},
+    "filters": {"execute": True, "binary": False, "binaryObject": False},
+    "tools": [],
+    "libraries": [],
+}
+
+
+def _asm_response(j: t.Any, asm_filter: AsmFilter | None = None) -> ASMResponse:
+    return ASMResponse(
+        provider="godbolt",
+        asm=decode_asm(t.cast(list[t.Any], field(j, "asm", list)), asm_filter),
+        stderr=_get_text_or_none(j, "stderr"),
+        code=field(j, "code", int),
+    )
+
+
+def _run_response(j: t.Any) -> RunResponse:
+    exit_code = field(j, "code", int)
+    stdout = _get_text_or_none(j, "stdout")
+
+    if exit_code == -1:
+        # Build failure
+        return RunResponse(
+            stdout=stdout,
+            stderr=_get_text_or_none(field(j, "buildResult", dict), "stderr"),
+            output=stdout,
+            signal=None,
+            provider="godbolt",
+            code=exit_code,
+        )
+
+    return RunResponse(
+        stdout=stdout,
+        stderr=_get_text_or_none(j, "stderr"),
+        output=stdout,
+        signal=None,
+        provider="godbolt",
+        code=exit_code,
+    )
+
+
+def _combined_response(
+    j: t.Any, asm_filter: AsmFilter | None = None
+) -> tuple[ASMResponse, RunResponse]:
+    asm = _asm_response(j, asm_filter)
+
+    if (exec_result := t.cast(t.Any, optional_field(j, "execResult", dict))) is None:
+        # Compiler Explorer doesn't execute the code when the build fails.
+        run = RunResponse(
+            stdout=None,
+            stderr=asm.stderr,
+            output=None,
+            signal=None,
+            provider="godbolt",
+            code=-1,
+        )
+    else:
+        run = _run_response(exec_result)
+
+    return asm, run
+
+
+def _cache_key(compiler_id: str, code: str) -> tuple[str, bytes]:
+    return compiler_id, hashlib.sha256(code.encode()).digest()
 
 
 class Client:
-    def __init__(self, url: str) -> None:
-        self.url = url.removesuffix("/")
-        self.compilers: list[Compiler] = []
-        self.lanauges: dict[str, Language] = {}
-        self._aiohttp: aiohttp.ClientSession | None = None
+    def __init__(self, pool: BackendPool) -> None:
+        self.pool = pool
+        self._asm = cachetools.TTLCache[tuple[str, bytes], ASMResponse](
+            maxsize=ASM_CACHE_SIZE, ttl=ASM_CACHE_TTL
+        )
+        """Unfiltered asm by compiler and code hash."""
+        self._runs = cachetools.TTLCache[tuple[str, bytes], RunResponse](
+            maxsize=ASM_CACHE_SIZE, ttl=ASM_CACHE_TTL
+        )
+        """
+        Runs of code that was compiled to asm, by compiler and code hash. Each is
+        only used by the next `execute` of the code.
+        """
+        self._asm_wanted = cachetools.TTLCache[tuple[str, bytes], bool](
+            maxsize=ASM_CACHE_SIZE, ttl=ASM_CACHE_TTL
+        )
+        """Compilers and code hashes the asm was recently asked for."""
 
     @classmethod
-    async def build(cls, url: str) -> t.Self:
-        self = cls(url=url)
-        self._aiohttp = aiohttp.ClientSession(headers={"Accept": "application/json"})
+    async def build(
+        cls,
+        backends: t.Sequence[BackendConfig],
+        tasks: TaskSupervisor,
+        hedging: HedgePolicy | None = None,
+    ) -> t.Self:
+        return cls(
+            await BackendPool.build(
+                backends,
+                tasks=tasks,
+                headers={"Accept": "application/json"},
+                health_path="/languages",
+                hedging=hedging,
+            )
+        )
 
-        return self
+    async def close(self) -> None:
+        await self.pool.close()
 
-    @property
-    def aiohttp(self) -> aiohttp.ClientSession:
-        assert self._aiohttp, "Aiohttp client needs to be created."
-        return self._aiohttp
+    async def _get_backend_compilers(self, backend: Backend) -> list[Compiler]:
+        async with self.pool.use(backend), backend.session.get(
+            backend.url + "/compilers", params={"fields": ",".join(COMPILER_FIELDS)}
+        ) as resp:
+            resp.raise_for_status()
+            body = await resp.read()
 
-    async def get_compilers(self) -> list[Compiler]:
-        async with self.aiohttp.get(self.url + "/compilers") as resp:
-            compilers: list[Compiler] = []
-            for c in await resp.json():
-                c = Compiler.from_payload(c)
-                compilers.append(c)
+        compilers = parse(body, lambda j: [Compiler.from_payload(c) for c in j])
+
+        if backend.langs is not None:
+            compilers = [c for c in compilers if c.lang in backend.langs]
+
+        backend.runtimes = {c.id for c in compilers}
 
         return compilers
 
-    async def get_languages(self) -> dict[str, Language]:
-        async with self.aiohttp.get(self.url + "/languages") as resp:
-            return {
-                p["name"].lower(): Language.from_payload(p) for p in await resp.json()
-            }
+    async def get_compilers(self) -> list[Compiler]:
+        """Fetch the compilers of every backend and merge them."""
+        results = await asyncio.gather(
+            *map(self._get_backend_compilers, self.pool.backends),
+            return_exceptions=True,
+        )
+
+        out: dict[str, Compiler] = {}
+        errors: list[BaseException] = []
+
+        for backend, result in zip(self.pool.backends, results):
+            if isinstance(result, BaseException):
+                LOG.warning(f"Could not fetch compilers from {backend}: {result!r}")
+                errors.append(result)
+                continue
+
+            for c in result:
+                out.setdefault(c.id, c)
+
+        if errors and not out:
+            raise errors[0]
+
+        return list(out.values())
+
+    async def get_languages(self) -> list[Language]:
+        backend = self.pool.pick()
+        assert backend, "There must be at least one Godbolt backend."
+
+        async with self.pool.use(backend), backend.session.get(
+            backend.url + "/languages", params={"fields": ",".join(LANGUAGE_FIELDS)}
+        ) as resp:
+            resp.raise_for_status()
+            body = await resp.read()
+
+        return parse(body, lambda j: [Language.from_payload(p) for p in j])
 
     async def compile(
-        self, lang: str, compiler_id: str, code: str
+        self,
+        lang: str,
+        compiler_id: str,
+        code: str,
+        *,
+        asm_filter: AsmFilter | None = None,
     ) -> Result[ASMResponse, str]:
-        async with self.aiohttp.post(
-            CONFIG.GODBOLT + f"/compiler/{compiler_id}/compile",
+        """
+        Generate the asm of code and run it with the same compilation. The asm is
+        cached, and the run is kept for the next `execute` of the code, so running
+        code after inspecting it doesn't compile it again. `asm_filter` only keeps
+        part of the asm, so filtered asm is neither cached nor served from the cache.
+        """
+        key = _cache_key(compiler_id, code)
+        self._asm_wanted[key] = True
+
+        if not asm_filter and (cached := self._asm.get(key)):
+            # A copy, so the cached response isn't changed by whoever uses it.
+            return Ok(dataclasses.replace(cached, cached=True))
+
+        result = await self.pool.request(
+            lang,
+            compiler_id,
+            lambda backend: self._compile_and_execute(
+                backend, lang, compiler_id, code, asm_filter
+            ),
+        )
+
+        if result is None:
+            return Err(f"No Godbolt backend has the compiler `{compiler_id}`.")
+        if isinstance(result, Err):
+            return result
+
+        asm, self._runs[key] = result.value
+        if not asm_filter:
+            self._asm[key] = asm
+
+        return Ok(asm)
+
+    async def execute(
+        self, lang: str, compiler_id: str, code: str
+    ) -> Result[RunResponse, str]:
+        """
+        Run code. The run made by a `compile` of the same code is used once, anything
+        else runs the code.
+
+        Runs don't generate asm unless the asm of the code was recently asked for but
+        isn't cached. Most runs are never inspected, and asm makes the response
+        hundreds of times larger, so running and then inspecting code compiles it
+        twice.
+        """
+        key = _cache_key(compiler_id, code)
+
+        if (run := self._runs.pop(key, None)) is not None:
+            return Ok(dataclasses.replace(run, cached=True))
+
+        if key in self._asm_wanted and key not in self._asm:
+            result = await self.pool.request(
+                lang,
+                compiler_id,
+                lambda backend: self._compile_and_execute(
+                    backend, lang, compiler_id, code, None
+                ),
+            )
+            if isinstance(result, Ok):
+                asm, run = result.value
+                self._asm[key] = asm
+                result = Ok(run)
+        else:
+            result = await self.pool.request(
+                lang,
+                compiler_id,
+                lambda backend: self._execute(backend, lang, compiler_id, code),
+            )
+
+        if result is None:
+            return Err(f"No Godbolt backend has the compiler `{compiler_id}`.")
+
+        return result
+
+    async def _execute(
+        self, backend: Backend, lang: str, compiler_id: str, code: str
+    ) -> Result[RunResponse, str]:
+        async with backend.session.post(
+            backend.url + f"/compiler/{compiler_id}/compile",
             json={
                 "source": code,
                 "lang": lang.lower(),
-                "options": {
-                    "compilerOptions": {
-                        "executorRequest": False,
-                    },
-                    "filters": {
-                        "binary": False,
-                        "binaryObject": False,
-                        "commentOnly": True,
-                        "demangle": True,
-                        "directives": True,
-                        "execute": False,
-                        "intel": True,
-                        "labels": True,
-                        "libraryCode": False,
-                        "trim": False,
-                    },
-                },
+                "options": _EXECUTE_OPTIONS,
             },
         ) as resp:
-            try:
-                resp.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                return Err("An unexpected error occurred:" + e.message)
-
-            j = await resp.json()
-            return Ok(
-                ASMResponse(
-                    provider="godbolt",
-                    asm=t.cast(str, _get_text_or_none(j["asm"])),
-                    stderr=_get_text_or_none(j["stderr"]),
-                    code=j["code"],
-                )
-            )
+            if (error := response_error(resp)) is not None:
+                return error
 
-    async def execute(
-        self, lang: str, compiler_id: str, code: str
-    ) -> Result[RunResponse, str]:
-        async with self.aiohttp.post(
-            CONFIG.GODBOLT + f"/compiler/{compiler_id}/compile",
+            return decode(await resp.read(), _run_response)
+
+    async def _compile_and_execute(
+        self,
+        backend: Backend,
+        lang: str,
+        compiler_id: str,
+        code: str,
+        asm_filter: AsmFilter | None,
+    ) -> Result[tuple[ASMResponse, RunResponse], str]:
+        async with backend.session.post(
+            backend.url + f"/compiler/{compiler_id}/compile",
             json={
                 "source": code,
                 "lang": lang.lower(),
                 "options": {
                     "compilerOptions": {
-                        "executorRequest": True,
-                    },
-                    "filters": {
-                        "execute": True,
+                        "executorRequest": False,
                     },
+                    "filters": {**_ASM_FILTERS, "execute": True},
                 },
             },
         ) as resp:
-            try:
-                resp.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                return Err("An unexpected error occurred:" + e.message)
-
-            j = await resp.json()
-
-            exit_code = j["code"]
-
-            if exit_code == -1:
-                # Build failure
-                return Ok(
-                    RunResponse(
-                        stdout=_get_text_or_none(j["stdout"]),
-                        stderr=_get_text_or_none(j["buildResult"]["stderr"]),
-                        output=_get_text_or_none(j["stdout"]),
-                        signal=None,
-                        provider="godbolt",
-                        code=exit_code,
-                    )
-                )
-
-            return Ok(
-                RunResponse(
-                    stdout=_get_text_or_none(j["stdout"]),
-                    stderr=_get_text_or_none(j["stderr"]),
-                    output=_get_text_or_none(j["stdout"]),
-                    signal=None,
-                    provider="godbolt",
-                    code=j["code"],
-                )
-            )
+            if (error := response_error(resp)) is not None:
+                return error
 
-    async def update_data(self) -> None:
-        self.compilers = await self.get_compilers()
-        self.lanauges = await self.get_languages()
+            return decode(
+                await resp.read(), lambda j: _combined_response(j, asm_filter)
+            )
@@ -1,10 +1,18 @@
 import dataclasses
+import sys
 import typing as t
 
-__all__: list[str] = ["Compiler"]
+from bot.decode import field
 
+__all__: list[str] = ["Compiler", "COMPILER_FIELDS", "Language", "LANGUAGE_FIELDS"]
 
-@dataclasses.dataclass
+COMPILER_FIELDS = ("id", "name", "lang", "compilerType", "semver", "instructionSet")
+"""The only fields requested from `/compilers`."""
+LANGUAGE_FIELDS = ("id", "name", "extensions")
+"""The only fields requested from `/languages`."""
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
 class Compiler:
     id: str
     name: str
@@ -15,28 +23,28 @@ class Compiler:
 
     @classmethod
     def from_payload(cls, payload: t.Any) -> t.Self:
+        # There are thousands of compilers but only a few languages, compiler types
+        # and instruction sets, so those strings are interned.
         return cls(
-            id=payload["id"],
-            name=payload["name"],
-            lang=payload["lang"],
-            compiler_type=payload["compilerType"],
-            semver=payload["semver"],
-            instruction_set=payload["instructionSet"],
+            id=field(payload, "id", str),
+            name=field(payload, "name", str),
+            lang=sys.intern(field(payload, "lang", str)),
+            compiler_type=sys.intern(field(payload, "compilerType", str)),
+            semver=field(payload, "semver", str),
+            instruction_set=sys.intern(field(payload, "instructionSet", str)),
         )
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Language:
     id: str
     name: str
     extensions: list[str]
-    monaco: str
 
     @classmethod
     def from_payload(cls, payload: t.Any) -> t.Self:
         return cls(
-            id=payload["id"],
-            name=payload["name"],
-            extensions=payload["extensions"],
-            monaco=payload["monaco"],
+            id=field(payload, "id", str),
+            name=field(payload, "name", str),
+            extensions=t.cast(list[str], field(payload, "extensions", list)),
         )
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import collections
+import typing as t
+
+__all__: list[str] = ["HedgePolicy"]
+
+
+class HedgePolicy:
+    """
+    Decides when a slow request should be duplicated to another backend.
+
+    A request is hedged once it has taken longer than the `percentile` latency
+    observed for its runtime. Every request earns `budget` hedges, so at most
+    roughly that fraction of requests is ever sent twice.
+    """
+
+    def __init__(
+        self,
+        budget: float,
+        *,
+        percentile: float = 0.95,
+        window: int = 100,
+        min_samples: int = 20,
+        max_credit: float = 10,
+    ) -> None:
+        self.budget = budget
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        """Requests to a runtime that have to finish before it is hedged."""
+        self.max_credit = max_credit
+        """Maximum amount of hedges that can be saved up while traffic is quiet."""
+
+        self._latencies: dict[t.Hashable, collections.deque[float]] = {}
+        self._credit = 0.0
+
+        self.requests = 0
+        self.hedges = 0
+        """Requests that were sent a second time."""
+        self.wins = 0
+        """Hedges that answered before the original request."""
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedges / self.requests if self.requests else 0
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.hedges if self.hedges else 0
+
+    def delay(self, runtime: t.Hashable) -> float | None:
+        """
+        Count a request and return how long to wait before hedging it, or `None`
+        if it shouldn't be hedged.
+        """
+        self.requests += 1
+        self._credit = min(self._credit + self.budget, self.max_credit)
+
+        latencies = self._latencies.get(runtime)
+        if not latencies or len(latencies) < self.min_samples:
+            return None
+
+        ordered = sorted(latencies)
+        return ordered[min(int(len(ordered) * self.percentile), len(ordered) - 1)]
+
+    def try_hedge(self) -> bool:
+        """Spend a hedge from the budget. Returns `False` if it is used up."""
+        if self._credit < 1:
+            return False
+
+        self._credit -= 1
+        self.hedges += 1
+        return True
+
+    def record(self, runtime: t.Hashable, latency: float) -> None:
+        if (latencies := self._latencies.get(runtime)) is None:
+            latencies = self._latencies[runtime] = collections.deque(maxlen=self.window)
+        latencies.append(latency)
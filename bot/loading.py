@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import typing as t
+
+import hikari
+
+from bot.tasks import TaskSupervisor
+
+__all__: list[str] = ["LoadingReactions"]
+
+_Key = tuple[hikari.Snowflake, hikari.Snowflake]
+"""A channel ID and message ID."""
+
+
+class LoadingReactions:
+    """
+    Shows a loading reaction on messages whose command is taking a while.
+
+    The reaction is only added once a command has run for `delay` seconds, so fast
+    commands make no reaction REST calls at all. Removing it waits `grace` seconds,
+    so a message that is run again right away keeps its reaction instead of having
+    it removed and added back.
+    """
+
+    def __init__(
+        self,
+        rest: hikari.api.RESTClient,
+        tasks: TaskSupervisor,
+        *,
+        emoji: hikari.Emoji,
+        delay: float,
+        grace: float = 1,
+    ) -> None:
+        self.rest = rest
+        self.tasks = tasks
+        self.emoji = emoji
+        self.delay = delay
+        self.grace = grace
+
+        self._active: dict[_Key, int] = {}
+        """Amount of commands running for each message."""
+        self._shown: set[_Key] = set()
+        """Messages the reaction has been added to."""
+        self._adding: dict[_Key, asyncio.Task[t.Any]] = {}
+        self._removals: dict[_Key, asyncio.Task[t.Any]] = {}
+
+    @contextlib.asynccontextmanager
+    async def show(
+        self, *, channel_id: hikari.Snowflake, message_id: hikari.Snowflake
+    ) -> t.AsyncGenerator[None, None]:
+        """Show the reaction on a message while the body runs, if it is slow."""
+        key = (channel_id, message_id)
+        self._active[key] = self._active.get(key, 0) + 1
+
+        if removal := self._removals.pop(key, None):
+            # The reaction is still there, so it is kept instead.
+            removal.cancel()
+
+        if (
+            key not in self._shown
+            and key not in self._adding
+            and (adding := self.tasks.spawn(self._add_later(key), name="add reaction"))
+        ):
+            self._adding[key] = adding
+
+        try:
+            yield
+        finally:
+            self._active[key] -= 1
+
+            if not self._active[key]:
+                del self._active[key]
+                adding = self._adding.pop(key, None)
+
+                if key in self._shown:
+                    # Removals are left to the supervisor, so they are finished
+                    # when the bot shuts down.
+                    removal = self.tasks.spawn(
+                        self._remove_later(key, adding), name="remove reaction"
+                    )
+                    if removal:
+                        self._removals[key] = removal
+                elif adding:
+                    adding.cancel()
+
+    async def _add_later(self, key: _Key) -> None:
+        await asyncio.sleep(self.delay)
+
+        self._shown.add(key)
+        try:
+            await self.rest.add_reaction(*key, emoji=self.emoji)
+        except hikari.HTTPError:
+            self._shown.discard(key)
+
+    async def _remove_later(
+        self, key: _Key, adding: asyncio.Task[t.Any] | None
+    ) -> None:
+        if adding:
+            # The reaction can't be removed before it is added.
+            await asyncio.wait({adding})
+
+        await asyncio.sleep(self.grace)
+
+        self._removals.pop(key, None)
+        if key not in self._shown:
+            return
+        self._shown.discard(key)
+
+        with contextlib.suppress(hikari.HTTPError):
+            await self.rest.delete_my_reaction(*key, emoji=self.emoji)
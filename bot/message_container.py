@@ -1,20 +1,24 @@
 import abc
 import asyncio
-import datetime
+import contextlib
+import functools
+import math
 import re
 import typing as t
 
-import cachetools
 import crescent
 import flare
 import hikari
 import hikari.components
 from result import Err, Ok, Result
 
+from bot import fixes
 from bot.config import CONFIG
 from bot.display import TextDisplay
-from bot.fixes import transform_code
-from bot.plugins.prefixes import PREFIX_CACHE
+from bot.loading import LoadingReactions
+from bot.model import Model
+from bot.progress import ProgressiveMessage
+from bot.state import MessageOwner, StateBackend, TrackedMessage
 from bot.version_manager import Language
 
 
@@ -26,47 +30,79 @@ class Code(t.NamedTuple):
     compiler_args: str | None
     args: str | None
     stdin: str | None
+    options: dict[str, str]
+    """`key=value` arguments after the command, like `fn=main`."""
 
 
 class ArgResult(t.NamedTuple):
-    runtime_name: str
+    runtime_name: str | None
     runtime_version: str | None
 
     compiler_args: str
     args: str
     stdin: str
+    options: dict[str, str]
 
 
-bot_messages: t.MutableMapping[
-    hikari.Snowflake, tuple[hikari.Snowflake | None, hikari.Snowflake]
-] = cachetools.TTLCache(
-    maxsize=10000, ttl=datetime.timedelta(minutes=20).total_seconds()
-)
-"""Dictionary of bot messages to (User Message, User that used it)."""
+CODE_REGEX = re.compile(r"```[^`]*```", flags=re.S)
 
+THROTTLED_EMOJI = hikari.UnicodeEmoji("⏱️")
+"""Reacted to messages whose run was turned away by a quota."""
 
-CODE_REGEX = re.compile(r"```[^`]*```", flags=re.S)
+_containers: dict[str, "MessageContainer"] = {}
+"""Dictionary of container prefixes to containers."""
+
+
+P = t.ParamSpec("P")
+_ContainerT = t.TypeVar("_ContainerT", bound="MessageContainer")
+
+
+def _in_flight(
+    handler: t.Callable[t.Concatenate[_ContainerT, P], t.Awaitable[None]]
+) -> t.Callable[t.Concatenate[_ContainerT, P], t.Coroutine[t.Any, t.Any, None]]:
+    """Count a handler as a run in flight, so it can finish before the bot stops."""
+
+    @functools.wraps(handler)
+    async def wrapper(self: _ContainerT, *args: P.args, **kwargs: P.kwargs) -> None:
+        async with self.model.drain.track():
+            await handler(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _throttled_message(wait: float) -> str:
+    return f"You are running code too often. Try again in {math.ceil(wait)}s."
+
+
+class _SelectOptions(t.NamedTuple):
+    options: tuple[tuple[str, hikari.SelectMenuOption], ...]
+    """The first 25 versions and their option, none of which are selected."""
+    labels: dict[str, str]
+    """Dictionary of every version to its full name."""
 
 
 class MessageContainer(abc.ABC):
     """Message container meant to handle editable messages."""
 
-    def __init__(self, app: hikari.GatewayBot, unalias: t.Callable[[str], str]) -> None:
-        self.unalias = unalias
+    def __init__(self, app: hikari.GatewayBot, model: Model) -> None:
+        self.unalias = model.unalias
         self.app = app
-        self.message_cache: t.MutableMapping[
-            hikari.Snowflake, hikari.Snowflake
-        ] = cachetools.TTLCache(
-            maxsize=10000, ttl=datetime.timedelta(minutes=20).total_seconds()
+        self.model = model
+        self.loading = LoadingReactions(
+            app.rest,
+            model.tasks,
+            emoji=CONFIG.LOADING_EMOJI,
+            delay=CONFIG.LOADING_DELAY,
         )
-        """Dictionary of user messages to bot messages."""
 
-        self.old_messages: t.MutableMapping[
-            hikari.Snowflake, hikari.PartialMessage
-        ] = cachetools.TTLCache(
-            maxsize=10000, ttl=datetime.timedelta(minutes=20).total_seconds()
-        )
-        """dictionary of message ID to the previous version of the message"""
+        # Components refer to the container by its prefix, so any process that has
+        # the plugin loaded can handle them.
+        _containers[self.get_prefix()] = self
+
+    @property
+    def state(self) -> StateBackend:
+        """Where user messages are mapped to bot messages. Namespaced by prefix."""
+        return self.model.state
 
     async def _parse_message(
         self, message: hikari.Message | None
@@ -86,11 +122,13 @@ class MessageContainer(abc.ABC):
         args: str | None = None
         compiler_args: str | None = None
         stdin: str | None = None
+        options: dict[str, str] = {}
 
         if not match:
             for attachment in message.attachments:
                 if "." in attachment.filename:
-                    runtime_name = attachment.filename.split(".")[1]
+                    # Resolved from the extension, like names and aliases.
+                    runtime_name = attachment.filename.rpartition(".")[2]
                     code = (await attachment.read()).decode()
                     break
             else:
@@ -108,7 +146,7 @@ class MessageContainer(abc.ABC):
             runtime_name = code_lines[0].strip().removeprefix("```")
             code = "\n".join(code_lines[1:-1])
 
-        if message_args := self._find_args(message):
+        if message_args := await self._find_args(message.content, message.guild_id):
             # The runtime name and version in the message takes priority over
             # the runtime name in the codeblock.
             runtime_name = runtime_name or message_args.runtime_name
@@ -116,35 +154,50 @@ class MessageContainer(abc.ABC):
             args = message_args.args
             compiler_args = message_args.compiler_args
             stdin = message_args.stdin
+            options = message_args.options
 
         return Ok(
             Code(
-                runtime_name=self.unalias(runtime_name),
+                runtime_name=self.unalias(runtime_name or ""),
                 runtime_version=runtime_version,
                 code=code,
                 args=args,
                 compiler_args=compiler_args,
                 stdin=stdin,
+                options=options,
             )
         )
 
-    def _find_args(self, message: hikari.PartialMessage | None) -> ArgResult | None:
-        if not message or not message.content:
+    async def _find_args(
+        self, content: hikari.UndefinedNoneOr[str], guild_id: hikari.Snowflake | None
+    ) -> ArgResult | None:
+        if not content:
             return None
 
         # args can only be entered after the command prefix
-        if not self.starts_with_prefix(
-            message=message.content,
+        if not await self.starts_with_prefix(
+            message=content,
             me=self.app.get_me(),
-            guild_id=message.guild_id,
+            guild_id=guild_id,
         ):
             return None
 
-        # args are entered like `io/run python3`
-        args = CODE_REGEX.sub("", message.content).splitlines()[0].split(" ")[1:]
+        # args are entered like `io/run python3` or `io/asm c fn=main`
+        args = CODE_REGEX.sub("", content).splitlines()[0].split(" ")[1:]
+        options = dict(arg.split("=", 1) for arg in args if "=" in arg)
+        args = [arg for arg in args if arg and "=" not in arg]
 
         if not args:
-            return None
+            if not options:
+                return None
+            return ArgResult(
+                runtime_name=None,
+                runtime_version=None,
+                args="",
+                compiler_args="",
+                stdin="",
+                options=options,
+            )
 
         # For now only the version is used
         lang_and_version = args[0]
@@ -168,6 +221,7 @@ class MessageContainer(abc.ABC):
             args="",
             compiler_args="",
             stdin="",
+            options=options,
         )
 
     async def with_code_wrapper(
@@ -176,9 +230,20 @@ class MessageContainer(abc.ABC):
         message: hikari.Message,
         runtime_version: str | None = None,
         runtime_name: str | None = None,
+        progress: ProgressiveMessage | None = None,
     ) -> Result[
         tuple[TextDisplay, flare.Row], tuple[TextDisplay, hikari.UndefinedType]
     ]:
+        if self.model.drain.draining:
+            return Err(
+                (
+                    TextDisplay(
+                        error="The bot is restarting. Please try again in a few seconds."
+                    ),
+                    hikari.UNDEFINED,
+                )
+            )
+
         # TODO: Support stdin and args passed into program.
         res = await self._parse_message(message)
 
@@ -222,7 +287,10 @@ class MessageContainer(abc.ABC):
         text = await self.with_code(
             runtime_name,
             language.version,
-            transform_code(runtime_name, res.value.code),
+            fixes.transform_code(runtime_name, res.value.code),
+            progress=progress,
+            options=res.value.options,
+            line_offset=fixes.added_lines(runtime_name, res.value.code),
         )
 
         return Ok(
@@ -239,41 +307,110 @@ class MessageContainer(abc.ABC):
             )
         )
 
-    async def add_reaction(
-        self, *, channel_id: hikari.Snowflake, message_id: hikari.Snowflake
-    ) -> None:
-        await self.app.rest.add_reaction(
-            channel_id,
-            message_id,
-            emoji=CONFIG.LOADING_EMOJI,
+    @abc.abstractmethod
+    async def with_code(
+        self,
+        lang: str,
+        version: str | None,
+        code: str,
+        progress: ProgressiveMessage | None = None,
+        options: t.Mapping[str, str] | None = None,
+        line_offset: int = 0,
+    ) -> TextDisplay:
+        """
+        Do something with the code. Partial results can be shown with `progress`
+        while that happens. `options` are the `key=value` arguments of the message.
+        `line_offset` is the amount of lines added before the code the user wrote.
+        """
+
+    def progress(
+        self,
+        *,
+        send: t.Callable[[str], t.Awaitable[hikari.Message]] | None = None,
+        edit: t.Callable[[hikari.Message, str], t.Awaitable[t.Any]] | None = None,
+        message: hikari.Message | None = None,
+    ) -> ProgressiveMessage | None:
+        """Returns `None` if output isn't streamed."""
+        if not CONFIG.STREAM_OUTPUT:
+            return None
+
+        return ProgressiveMessage(
+            interval=CONFIG.STREAM_EDIT_INTERVAL,
+            edit=edit or self._edit_content,
+            send=send,
+            message=message,
         )
 
-    def remove_reaction(
-        self, *, channel_id: hikari.Snowflake, message_id: hikari.Snowflake
-    ) -> None:
-        asyncio.ensure_future(
-            self.app.rest.delete_my_reaction(
-                channel_id,
-                message_id,
-                emoji=CONFIG.LOADING_EMOJI,
-            )
+    async def _edit_content(self, message: hikari.Message, content: str) -> None:
+        await self.app.rest.edit_message(
+            message.channel_id, message, content=content, mentions_reply=False
         )
 
-    @abc.abstractmethod
-    async def with_code(self, lang: str, version: str | None, code: str) -> TextDisplay:
-        """Do something with the code."""
+    async def _throttled(
+        self,
+        user_id: hikari.Snowflake,
+        guild_id: hikari.Snowflake | None,
+        message: hikari.PartialMessage,
+    ) -> bool:
+        """
+        Take a run from the quotas. If the user or guild is over quota, the message is
+        reacted to instead and `True` is returned.
+        """
+        if await self.model.quotas.acquire(user_id, guild_id) is None:
+            return False
+
+        with contextlib.suppress(hikari.HTTPError):
+            await self.app.rest.add_reaction(
+                message.channel_id, message.id, THROTTLED_EMOJI
+            )
+        return True
+
+    async def _track(
+        self,
+        message: hikari.Message,
+        resp_message: hikari.Message,
+        user_id: hikari.Snowflake,
+    ) -> None:
+        await self.state.set_tracked(
+            self.get_prefix(),
+            message.id,
+            TrackedMessage(
+                response_id=resp_message.id,
+                content=message.content,
+                guild_id=message.guild_id,
+            ),
+        )
+        await self.state.set_owner(
+            resp_message.id, MessageOwner(message_id=message.id, user_id=user_id)
+        )
 
+    @_in_flight
     async def on_command(self, ctx: crescent.Context, message: hikari.Message) -> None:
-        if self.message_cache.get(message.id):
+        if await self.state.get_tracked(self.get_prefix(), message.id):
             await ctx.respond(
                 "This code already has a runner tied to it. Edit the message to run new code.",
                 ephemeral=True,
             )
             return
 
+        if wait := await self.model.quotas.acquire(ctx.user.id, ctx.guild_id):
+            await ctx.respond(_throttled_message(wait), ephemeral=True)
+            return
+
         await ctx.defer()
 
-        text, component = (await self.with_code_wrapper(ctx.user.id, message)).value
+        # The deferred response is edited, so it never has to be sent.
+        progress = self.progress(
+            send=lambda content: ctx.edit(content),
+            edit=lambda _, content: ctx.edit(content),
+        )
+
+        text, component = (
+            await self.with_code_wrapper(ctx.user.id, message, progress=progress)
+        ).value
+
+        if progress:
+            await progress.finish()
 
         resp_message = await ctx.respond(
             content=text.format(),
@@ -281,29 +418,16 @@ class MessageContainer(abc.ABC):
             ensure_message=True,
         )
 
-        self.message_cache[message.id] = resp_message.id
-        self.old_messages[message.id] = message
-        bot_messages[resp_message.id] = (message.id, ctx.user.id)
+        await self._track(message, resp_message, ctx.user.id)
 
-    def starts_with_prefix(
+    async def starts_with_prefix(
         self,
         *,
         message: str,
         me: hikari.OwnUser | None,
         guild_id: hikari.Snowflake | None,
     ) -> bool:
-        if guild_id:
-            guild_prefixes = (
-                guild_prefix + self.get_prefix()
-                for guild_prefix in PREFIX_CACHE[guild_id]
-            )
-        else:
-            guild_prefixes = ()
-
-        mentions = [
-            CONFIG.PREFIX + self.get_prefix(),
-            *guild_prefixes,
-        ]
+        mentions = [CONFIG.PREFIX + self.get_prefix()]
         if me:
             mentions.extend(
                 [
@@ -312,8 +436,20 @@ class MessageContainer(abc.ABC):
                 ]
             )
 
-        return message.startswith(tuple(mentions))
+        if message.startswith(tuple(mentions)):
+            return True
+
+        if not guild_id:
+            return False
 
+        # Guild prefixes may need a database lookup, so they are checked last.
+        guild_prefixes = await self.model.prefixes.get(guild_id)
+
+        return message.startswith(
+            tuple(guild_prefix + self.get_prefix() for guild_prefix in guild_prefixes)
+        )
+
+    @_in_flight
     async def on_message(self, event: hikari.MessageCreateEvent) -> None:
         if not event.is_human:
             return
@@ -328,43 +464,63 @@ class MessageContainer(abc.ABC):
 
         content = event.message.content.lower()
 
-        if not self.starts_with_prefix(
+        if not await self.starts_with_prefix(
             message=content,
             me=me,
             guild_id=getattr(event, "guild_id"),
         ):
             return
 
-        await self.add_reaction(
-            channel_id=event.channel_id, message_id=event.message_id
-        )
-
-        text, component = (
-            await self.with_code_wrapper(event.author.id, event.message)
-        ).value
-
-        self.remove_reaction(channel_id=event.channel_id, message_id=event.message_id)
+        if await self._throttled(
+            event.author.id, getattr(event, "guild_id"), event.message
+        ):
+            return
 
-        resp_message = await event.message.respond(
-            content=text.format(),
-            component=component,
-            reply=event.message,
+        progress = self.progress(
+            send=lambda content: event.message.respond(
+                content=content, reply=event.message
+            )
         )
 
-        self.message_cache[event.message.id] = resp_message.id
-        self.old_messages[event.message.id] = event.message
-        bot_messages[resp_message.id] = (event.message.id, event.author.id)
+        async with self.loading.show(
+            channel_id=event.channel_id, message_id=event.message_id
+        ):
+            text, component = (
+                await self.with_code_wrapper(
+                    event.author.id, event.message, progress=progress
+                )
+            ).value
+
+        if progress and (resp_message := await progress.finish()):
+            resp_message = await self.app.rest.edit_message(
+                event.channel_id,
+                resp_message,
+                content=text.format(),
+                component=component,
+            )
+        else:
+            resp_message = await event.message.respond(
+                content=text.format(),
+                component=component,
+                reply=event.message,
+            )
+
+        await self._track(event.message, resp_message, event.author.id)
 
+    @_in_flight
     async def on_edit(self, event: hikari.MessageUpdateEvent) -> None:
-        bot_message = self.message_cache.get(event.message.id)
-        old_message = self.old_messages.get(event.message.id)
+        tracked = await self.state.get_tracked(self.get_prefix(), event.message.id)
 
-        if not (bot_message and old_message):
+        if not tracked:
             return
 
-        await self.add_reaction(
-            channel_id=event.channel_id, message_id=event.message_id
-        )
+        # The author is missing from updates that Discord makes itself, like embed
+        # previews, so those are checked once the message is fetched.
+        author_id = event.author_id
+        if author_id and await self._throttled(
+            author_id, event.message.guild_id, event.message
+        ):
+            return
 
         user_message, bot_message = await asyncio.gather(
             self.app.rest.fetch_message(
@@ -373,7 +529,7 @@ class MessageContainer(abc.ABC):
             ),
             self.app.rest.fetch_message(
                 event.message.channel_id,
-                bot_message,
+                tracked.response_id,
             ),
         )
 
@@ -396,8 +552,13 @@ class MessageContainer(abc.ABC):
             if options:
                 lang, version = options[0].value.split(":")
 
-        new_args = self._find_args(event.message)
-        old_args = self._find_args(old_message)
+        if not author_id and await self._throttled(
+            user_message.author.id, user_message.guild_id, user_message
+        ):
+            return
+
+        new_args = await self._find_args(event.message.content, event.message.guild_id)
+        old_args = await self._find_args(tracked.content, tracked.guild_id)
 
         # If the user edited the lang or version in the message arguments, we update
         # the lang and version. Otherwise the lang and version is not changed.
@@ -414,16 +575,23 @@ class MessageContainer(abc.ABC):
                 lang = new_message_runtime_name
                 version = new_message_runtime_version
 
-        text, component = (
-            await self.with_code_wrapper(
-                user_message.author.id,
-                user_message,
-                runtime_version=version,
-                runtime_name=lang,
-            )
-        ).value
+        progress = self.progress(message=bot_message)
 
-        self.remove_reaction(channel_id=event.channel_id, message_id=event.message_id)
+        async with self.loading.show(
+            channel_id=event.channel_id, message_id=event.message_id
+        ):
+            text, component = (
+                await self.with_code_wrapper(
+                    user_message.author.id,
+                    user_message,
+                    runtime_version=version,
+                    runtime_name=lang,
+                    progress=progress,
+                )
+            ).value
+
+        if progress:
+            await progress.finish()
 
         await self.app.rest.edit_message(
             event.channel_id,
@@ -434,12 +602,39 @@ class MessageContainer(abc.ABC):
         )
 
     async def on_delete(self, event: hikari.MessageDeleteEvent) -> None:
-        data = bot_messages.get(event.message_id)
-        bot_messages.pop(event.message_id, None)
+        # Every container sees every delete, so only the container that owns the
+        # bot message cleans up.
+        owner = await self.state.get_owner(event.message_id)
+
+        if not (owner and owner.message_id):
+            return
+
+        tracked = await self.state.get_tracked(self.get_prefix(), owner.message_id)
+
+        if tracked and tracked.response_id == event.message_id:
+            await self.state.pop_tracked(self.get_prefix(), owner.message_id)
+            await self.state.pop_owner(event.message_id)
+
+    def _render_select_options(self, lang: str) -> _SelectOptions:
+        options: list[tuple[str, hikari.SelectMenuOption]] = []
+        labels: dict[str, str] = {}
+
+        for runtime in self.get_runtimes(lang):
+            options.append(
+                (
+                    runtime.version,
+                    hikari.SelectMenuOption(
+                        label=runtime.full_name,
+                        value=f"{runtime.name}:{runtime.version}",
+                        description=None,
+                        emoji=None,
+                        is_default=False,
+                    ),
+                )
+            )
+            labels[runtime.version] = runtime.full_name
 
-        if data and data[0]:
-            self.message_cache.pop(data[0], None)
-            self.old_messages.pop(data[0], None)
+        return _SelectOptions(options=tuple(options[:25]), labels=labels)
 
     def get_select(
         self,
@@ -448,9 +643,11 @@ class MessageContainer(abc.ABC):
         lang: str,
         version: str | None,
     ) -> flare.TextSelect:
-        runtimes = self.get_runtimes(lang)
+        rendered = self.model.versions.cached(
+            ("select", self.get_prefix(), lang),
+            lambda: self._render_select_options(lang),
+        )
 
-        options: list[hikari.SelectMenuOption] = []
         select = version_select(
             author_id=author,
             channel_id=message.channel_id,
@@ -458,21 +655,24 @@ class MessageContainer(abc.ABC):
             container=self,
         )
 
-        for runtime in runtimes:
-            options.append(
+        if version in rendered.labels:
+            select.set_placeholder(rendered.labels[version])
+
+        # The cached options are shared, so the selected one is copied.
+        return select.set_options(
+            *(
                 hikari.SelectMenuOption(
-                    label=runtime.full_name,
-                    value=f"{runtime.name}:{runtime.version}",
+                    label=option.label,
+                    value=option.value,
                     description=None,
                     emoji=None,
-                    is_default=runtime.version == version,
+                    is_default=True,
                 )
+                if option_version == version
+                else option
+                for option_version, option in rendered.options
             )
-
-            if runtime.version == version:
-                select.set_placeholder(runtime.full_name)
-
-        return select.set_options(*options[:25])
+        )
 
     @staticmethod
     @abc.abstractmethod
@@ -490,7 +690,22 @@ class MessageContainer(abc.ABC):
         ...
 
 
-_interaction_lock: dict[hikari.Snowflake, str] = {}
+class _VersionRun:
+    """Coordinates the version selects for a single message."""
+
+    __slots__ = ("lock", "latest")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.latest: str | None = None
+        """The most recently selected version that hasn't been run yet."""
+
+
+_version_runs: dict[hikari.Snowflake, _VersionRun] = {}
+"""Dictionary of user messages to their version select coordination."""
+
+VERSION_RUN_TIMEOUT = 120
+"""Seconds a single version select run may take before it is abandoned."""
 
 
 @flare.text_select(min_values=1, max_values=1)
@@ -516,50 +731,69 @@ async def version_select(
         )
         return
 
-    if version := _interaction_lock.get(message_id):
+    if wait := await container.model.quotas.acquire(ctx.author.id, ctx.guild_id):
         await ctx.respond(
-            content=f"A request is already being processed for `{version}`. Please wait.",
-            flags=hikari.MessageFlag.EPHEMERAL,
+            content=_throttled_message(wait), flags=hikari.MessageFlag.EPHEMERAL
         )
         return
 
     _lang, version = ctx.values[0].split(":")
 
-    _interaction_lock[message_id] = version
-
-    await container.add_reaction(channel_id=channel_id, message_id=message_id)
-
     await ctx.defer()
 
-    message = await ctx.app.rest.fetch_message(channel_id, message_id)
-
-    text, component = (
-        await container.with_code_wrapper(
-            ctx.author.id, message, runtime_version=version
-        )
-    ).value
+    run = _version_runs.setdefault(message_id, _VersionRun())
+    run.latest = version
 
-    container.remove_reaction(channel_id=channel_id, message_id=message_id)
+    if run.lock.locked():
+        # The interaction that holds the lock picks up the newest version once
+        # its current run finishes.
+        return
 
-    await ctx.edit_response(
-        content=text.format(),
-        component=component,
-    )
+    async with container.model.drain.track(), run.lock, container.loading.show(
+        channel_id=channel_id, message_id=message_id
+    ):
+        try:
+            while run.latest:
+                version, run.latest = run.latest, None
 
-    _interaction_lock.pop(message_id)
+                async with asyncio.timeout(VERSION_RUN_TIMEOUT):
+                    message = await ctx.app.rest.fetch_message(channel_id, message_id)
 
+                    progress = container.progress(
+                        edit=lambda _, content: ctx.edit_response(content=content),
+                        message=ctx.message,
+                    )
 
-_saved: dict[int, MessageContainer] = {}
+                    text, component = (
+                        await container.with_code_wrapper(
+                            ctx.author.id,
+                            message,
+                            runtime_version=version,
+                            progress=progress,
+                        )
+                    ).value
+
+                    if progress:
+                        await progress.finish()
+
+                    await ctx.edit_response(
+                        content=text.format(),
+                        component=component,
+                    )
+        finally:
+            run.latest = None
+            # Nothing can acquire the lock between here and the end of the `with`
+            # block, so the entry is idle and can be dropped.
+            _version_runs.pop(message_id, None)
 
 
 class MessageContainerConverter(flare.Converter[MessageContainer | None]):
     async def to_str(self, obj: MessageContainer | None) -> str:
         assert obj
-        _saved[id(obj)] = obj
-        return str(id(obj))
+        return obj.get_prefix()
 
     async def from_str(self, obj: str) -> MessageContainer | None:
-        return _saved.get(int(obj))
+        return _containers.get(obj)
 
 
 flare.add_converter(MessageContainer, MessageContainerConverter)
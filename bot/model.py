@@ -1,40 +1,98 @@
 import asyncio
+import datetime
+import logging
+import time
 
 import hikari
 
+from bot import profiling
 from bot.config import CONFIG
-from bot.database import Database
+from bot.database import Database, ExecutionHistory, PrefixCache
+from bot.drain import Drain
+from bot.quotas import Quotas
+from bot.state import MemoryState, PostgresState, StateBackend
+from bot.tasks import TaskSupervisor
 from bot.version_manager import VersionManager
 
+LOG = logging.getLogger(__file__)
+
 
 class Model:
     def __init__(self) -> None:
         self._versions = VersionManager()
         self._db: Database | None = None
+        self._prefixes: PrefixCache | None = None
+        self._history: ExecutionHistory | None = None
+        self._state: StateBackend = MemoryState()
+        self.tasks = TaskSupervisor()
+        self.drain = Drain()
+        self.quotas = Quotas(user=CONFIG.USER_QUOTA, guild=CONFIG.GUILD_QUOTA)
 
     async def on_start(self, _: hikari.StartingEvent) -> None:
-        async with asyncio.TaskGroup() as tg:
-            versions_task = tg.create_task(
-                VersionManager.build(
-                    piston_url=CONFIG.PISTON, godbolt_url=CONFIG.GODBOLT
+        with profiling.phase("provider clients and database"):
+            async with asyncio.TaskGroup() as tg:
+                versions_task = tg.create_task(
+                    VersionManager.build(
+                        piston_backends=CONFIG.PISTON,
+                        godbolt_backends=CONFIG.GODBOLT,
+                        tasks=self.tasks,
+                        hedge_budget=CONFIG.HEDGE_BUDGET,
+                    )
                 )
-            )
-            db_task = tg.create_task(
-                Database.open(
-                    migrations_folder="migrations",
-                    port=CONFIG.DATABASE_PORT,
-                    host=CONFIG.DATABASE_HOST,
-                    database=CONFIG.DATABASE,
-                    user=CONFIG.DATABASE_USER,
-                    password=CONFIG.DATABASE_PASSWORD,
+                db_task = tg.create_task(
+                    Database.open(
+                        migrations_folder="migrations",
+                        port=CONFIG.DATABASE_PORT,
+                        host=CONFIG.DATABASE_HOST,
+                        database=CONFIG.DATABASE,
+                        user=CONFIG.DATABASE_USER,
+                        password=CONFIG.DATABASE_PASSWORD,
+                        min_pool_size=CONFIG.DATABASE_POOL_MIN,
+                        max_pool_size=CONFIG.DATABASE_POOL_MAX,
+                    )
                 )
-            )
 
         self._versions = await versions_task
         self._db = await db_task
 
+        self.tasks.supervise(self._versions.update, name="catalog update")
+        self.quotas.load_override = self.db.fetch_quotas
+
+        if CONFIG.EXECUTION_HISTORY:
+            self._history = ExecutionHistory(
+                self.db,
+                retention=datetime.timedelta(days=CONFIG.HISTORY_RETENTION_DAYS),
+            )
+            self._versions.history = self._history
+            self.tasks.supervise(self._history.run, name="history writer")
+
+        with profiling.phase("prefix cache"):
+            self._prefixes = PrefixCache(self.db, maxsize=CONFIG.PREFIX_CACHE_SIZE)
+            await self._prefixes.start(self.tasks, preload=CONFIG.PREFIX_PRELOAD)
+
+        with profiling.phase("state backend"):
+            if CONFIG.STATE_BACKEND == "postgres":
+                self._state = PostgresState(self.db)
+            await self._state.start(self.tasks)
+
+    async def on_stop(self, _: hikari.StoppingEvent) -> None:
+        # Draining and pending tasks share STOP_TIMEOUT, which leaves the rest of the
+        # container's grace period for the closes below.
+        deadline = time.monotonic() + CONFIG.STOP_TIMEOUT
+        # The gateway and REST are still open, so runs in flight can still reply.
+        if not await self.drain.drain(CONFIG.DRAIN_TIMEOUT):
+            LOG.warning(f"Stopping with {self.drain.running} runs still in flight.")
+        # Pending tasks may still need REST and the database, so they go first.
+        await self.tasks.close(max(0, deadline - time.monotonic()))
+        if self._history:
+            await self._history.close()
+        await self._state.close()
+        if self._prefixes:
+            await self._prefixes.close()
+        await self._versions.close()
+
     def unalias(self, lang: str) -> str:
-        return self.versions.piston.unalias(lang)
+        return self.versions.resolve(lang)
 
     @property
     def versions(self) -> VersionManager:
@@ -45,3 +103,17 @@ class Model:
     def db(self) -> Database:
         assert self._db, "Database has not been started"
         return self._db
+
+    @property
+    def history(self) -> ExecutionHistory | None:
+        """`None` if execution history is disabled."""
+        return self._history
+
+    @property
+    def prefixes(self) -> PrefixCache:
+        assert self._prefixes, "Database has not been started"
+        return self._prefixes
+
+    @property
+    def state(self) -> StateBackend:
+        return self._state
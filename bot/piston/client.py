@@ -1,85 +1,250 @@
+import asyncio
+import logging
 import typing
 
 import aiohttp
 from result import Err, Ok, Result
 
-from bot.piston.models import Runtime
+from bot.backend_pool import Backend, BackendPool, response_error
+from bot.config import BackendConfig
+from bot.decode import ShapeError, decode, field, optional_field, parse
+from bot.hedging import HedgePolicy
+from bot.piston.models import Runtime, Stage
 from bot.response import RunResponse
+from bot.tasks import TaskSupervisor
 
 __all__: list[str] = ["Client"]
 
+LOG = logging.getLogger(__file__)
 
-class Client:
-    def __init__(self, url: str) -> None:
-        self.url = url.removesuffix("/")
-        self.runtimes: list[Runtime] = []
-        self.aliases: dict[str, str] = {}
+STREAM_OUTPUT_LIMIT = 2000
+"""
+Characters kept of each stream of streamed output. Anything past what a Discord
+message can show is dropped as it arrives.
+"""
+
+STREAM_TIMEOUT = 5 * 60
+"""Seconds a stream may take, the same as the total timeout of HTTP requests."""
+STREAM_IDLE_TIMEOUT = 30
+"""Seconds without any message before a stream is given up on."""
+
+
+class _BoundedText:
+    """The start of a stream of text, up to `limit` characters."""
+
+    __slots__ = ("limit", "_parts", "_length")
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._parts: list[str] = []
+        self._length = 0
+
+    def append(self, text: str) -> None:
+        if self._length >= self.limit:
+            return
+
+        text = text[: self.limit - self._length]
+        self._parts.append(text)
+        self._length += len(text)
+
+    def __str__(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
 
-        self._aiohttp: aiohttp.ClientSession | None = None
+
+class Client:
+    def __init__(self, pool: BackendPool) -> None:
+        self.pool = pool
 
     @classmethod
-    async def build(cls, url: str) -> typing.Self:
+    async def build(
+        cls,
+        backends: typing.Sequence[BackendConfig],
+        tasks: TaskSupervisor,
+        hedging: HedgePolicy | None = None,
+    ) -> typing.Self:
         """The constructor for the piston client."""
-        self = cls(url=url)
-        self._aiohttp = aiohttp.ClientSession(
-            headers={"content-type": "application/json"}
+        return cls(
+            await BackendPool.build(
+                backends,
+                tasks=tasks,
+                headers={"content-type": "application/json"},
+                health_path="/runtimes",
+                hedging=hedging,
+            )
         )
 
-        return self
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def _get_backend_runtimes(self, backend: Backend) -> list[Runtime]:
+        async with self.pool.use(backend):
+            async with backend.session.get(backend.url + "/runtimes") as resp:
+                resp.raise_for_status()
+                body = await resp.read()
 
-    @property
-    def aiohttp(self) -> aiohttp.ClientSession:
-        assert self._aiohttp, "Aiohttp client needs to be created."
-        return self._aiohttp
+        runtimes = parse(body, lambda j: [Runtime.from_payload(r) for r in j])
 
-    async def get_runtimes(self) -> list[Runtime]:
-        async with self.aiohttp.get(self.url + "/runtimes") as resp:
-            resp.raise_for_status()
-            json = await resp.json()
+        if backend.langs is not None:
+            runtimes = [r for r in runtimes if r.language in backend.langs]
 
-        out: list[Runtime] = []
+        backend.runtimes = {(r.language, r.version) for r in runtimes}
 
-        for runtime in json:
-            r = Runtime.from_payload(runtime)
+        return runtimes
 
-            out.append(r)
+    async def get_runtimes(self) -> list[Runtime]:
+        """Fetch the runtimes of every backend and merge them."""
+        results = await asyncio.gather(
+            *map(self._get_backend_runtimes, self.pool.backends),
+            return_exceptions=True,
+        )
 
-            for alias in r.aliases:
-                self.aliases[alias] = r.language
+        out: dict[tuple[str, str], Runtime] = {}
+        errors: list[BaseException] = []
 
-        return out
+        for backend, result in zip(self.pool.backends, results):
+            if isinstance(result, BaseException):
+                LOG.warning(f"Could not fetch runtimes from {backend}: {result!r}")
+                errors.append(result)
+                continue
 
-    def unalias(self, lang: str) -> str:
-        return self.aliases.get(lang, lang)
+            for r in result:
+                out.setdefault((r.language, r.version), r)
 
-    async def update_data(self) -> None:
-        self.runtimes = await self.get_runtimes()
+        if errors and not out:
+            raise errors[0]
+
+        return list(out.values())
 
     async def execute(
         self, lang: str, version: str, code: str
     ) -> Result[RunResponse, str]:
-        async with self.aiohttp.post(
-            self.url + "/execute",
+        result = await self.pool.request(
+            lang,
+            (lang, version),
+            lambda backend: self._execute(backend, lang, version, code),
+        )
+
+        if result is None:
+            return Err(f"No Piston backend can run {lang} {version}.")
+
+        return result
+
+    async def _execute(
+        self, backend: Backend, lang: str, version: str, code: str
+    ) -> Result[RunResponse, str]:
+        async with backend.session.post(
+            backend.url + "/execute",
             json={
                 "language": lang,
                 "version": version,
                 "files": [{"content": code}],
             },
         ) as resp:
-            try:
-                resp.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                return Err("An unexpected error occurred:" + e.message)
+            if (error := response_error(resp)) is not None:
+                return error
+
+            run = decode(await resp.read(), lambda j: Stage.from_payload(j["run"]))
 
-            j = await resp.json()
+        if isinstance(run, Err):
+            return run
+
+        return Ok(
+            RunResponse(
+                stdout=run.value.stdout,
+                stderr=run.value.stderr,
+                output=run.value.output,
+                signal=run.value.signal,
+                code=run.value.code,
+                provider="piston",
+            )
+        )
+
+    async def stream(
+        self,
+        lang: str,
+        version: str,
+        code: str,
+        on_output: typing.Callable[[str], None],
+    ) -> Result[RunResponse, str]:
+        """
+        Execute code through Piston's WebSocket API. `on_output` is called with the
+        output so far every time more of it arrives.
+        """
+        backend = self.pool.pick(lang, (lang, version))
+
+        if not backend:
+            return Err(f"No Piston backend can run {lang} {version}.")
+
+        stdout = _BoundedText(STREAM_OUTPUT_LIMIT)
+        stderr = _BoundedText(STREAM_OUTPUT_LIMIT)
+        output = _BoundedText(STREAM_OUTPUT_LIMIT)
+        exit_code: int | None = None
+        signal: str | None = None
+
+        # The session's timeout doesn't cover the messages of a WebSocket. A stream
+        # that stops sending messages also counts against the backend, because the
+        # receive timeout is raised inside `use`.
+        try:
+            async with asyncio.timeout(STREAM_TIMEOUT), self.pool.use(
+                backend
+            ), backend.session.ws_connect(  # type: ignore
+                backend.url + "/connect",
+                receive_timeout=STREAM_IDLE_TIMEOUT,
+                heartbeat=STREAM_IDLE_TIMEOUT / 2,
+            ) as ws:
+                await ws.send_json(
+                    {
+                        "type": "init",
+                        "language": lang,
+                        "version": version,
+                        "files": [{"content": code}],
+                    }
+                )
+
+                async for message in ws:
+                    if message.type != aiohttp.WSMsgType.TEXT:  # type: ignore
+                        break
+
+                    try:
+                        event = parse(message.data, lambda j: j)  # type: ignore
+                        match field(event, "type", str):
+                            case "data":
+                                data = field(event, "data", str)
+                                if field(event, "stream", str) == "stdout":
+                                    stdout.append(data)
+                                else:
+                                    stderr.append(data)
+                                output.append(data)
+                                on_output(str(output))
+                            case "exit":
+                                # The compile stage exits first if there is one.
+                                exit_code = optional_field(event, "code", int)
+                                exit_code = -1 if exit_code is None else exit_code
+                                signal = optional_field(event, "signal", str)
+                            case "error":
+                                return Err(
+                                    "An unexpected error occurred:"
+                                    + field(event, "message", str)
+                                )
+                            case _:
+                                pass
+                    except ShapeError as e:
+                        return Err(f"An unexpected response was received: {e}")
+        except TimeoutError:
+            return Err("Piston took too long to answer.")
+
+        if exit_code is None:
+            return Err("Piston closed the connection before the code finished.")
 
         return Ok(
             RunResponse(
-                stdout=j["run"]["stdout"],
-                stderr=j["run"]["stderr"],
-                output=j["run"]["output"],
-                signal=j["run"]["signal"],
-                code=j["run"]["code"],
+                stdout=str(stdout),
+                stderr=str(stderr),
+                output=str(output),
+                signal=signal,
+                code=exit_code,
                 provider="piston",
             )
         )
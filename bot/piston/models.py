@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 import dataclasses
+import sys
 import typing as t
 
-__all__: list[str] = ["Runtime"]
+from bot.decode import field, optional_field
+
+__all__: list[str] = ["Runtime", "Stage"]
 
 
 @dataclasses.dataclass(slots=True)
@@ -15,14 +18,16 @@ class Runtime:
     @classmethod
     def from_payload(cls, payload: t.Any) -> t.Self:
         return cls(
-            payload["language"],
-            payload["version"],
-            payload["aliases"],
+            sys.intern(field(payload, "language", str)),
+            field(payload, "version", str),
+            t.cast(list[str], field(payload, "aliases", list)),
         )
 
 
 @dataclasses.dataclass(slots=True)
-class Compile:
+class Stage:
+    """The result of the compile or run stage of an execution."""
+
     stdout: str
     stderr: str
     output: str
@@ -31,10 +36,12 @@ class Compile:
 
     @classmethod
     def from_payload(cls, payload: t.Any) -> t.Self:
+        # The code is `null` if the process was killed by a signal.
+        code = optional_field(payload, "code", int)
         return cls(
-            stdout=payload["stdout"],
-            stderr=payload["stderr"],
-            output=payload["output"],
-            code=payload["code"],
-            signal=payload["signal"],
+            stdout=field(payload, "stdout", str),
+            stderr=field(payload, "stderr", str),
+            output=field(payload, "output", str),
+            code=-1 if code is None else code,
+            signal=optional_field(payload, "signal", str),
         )
@@ -1,9 +1,12 @@
+import typing as t
+
 import crescent
 import hikari
 from result import Err
 
 from bot.display import TextDisplay
 from bot.message_container import MessageContainer
+from bot.progress import ProgressiveMessage
 from bot.utils import Plugin
 from bot.version_manager import Language
 
@@ -12,9 +15,37 @@ plugin = Plugin()
 container: "Container"
 
 
+def _truncate(output: str) -> str:
+    if len(output) > 1900:
+        return output[:1900] + "..."
+    return output
+
+
 class Container(MessageContainer):
-    async def with_code(self, lang: str, version: str | None, code: str) -> TextDisplay:
-        result = await plugin.model.versions.execute(lang, code, version=version)
+    async def with_code(
+        self,
+        lang: str,
+        version: str | None,
+        code: str,
+        progress: ProgressiveMessage | None = None,
+        options: t.Mapping[str, str] | None = None,
+        line_offset: int = 0,
+    ) -> TextDisplay:
+        on_output: t.Callable[[str], None] | None = None
+        if progress:
+
+            def show_output(output: str) -> None:
+                progress.update(
+                    TextDisplay(
+                        title="**Program Output (running):**", code=_truncate(output)
+                    )
+                )
+
+            on_output = show_output
+
+        result = await plugin.model.versions.execute(
+            lang, code, version=version, on_output=on_output
+        )
 
         if isinstance(result, Err):
             return TextDisplay(
@@ -24,22 +55,22 @@ class Container(MessageContainer):
 
         if result.value.code != 0:
             return TextDisplay(
+                description=result.value.note,
                 error="There was an error while running your code!",
                 code=result.value.stderr or result.value.output,
             )
 
-        output = result.value.output or ""
-
-        if len(output) > 1900:
-            output = output[:1900] + "..."
-        else:
-            output = result.value.output
+        output = result.value.output
+        if output:
+            output = _truncate(output)
 
-        return TextDisplay(title="**Program Output:**", code=output)
+        return TextDisplay(
+            title="**Program Output:**", description=result.value.note, code=output
+        )
 
     @staticmethod
     def get_runtimes(lang: str) -> list[Language]:
-        return plugin.model.versions.langs[lang]
+        return plugin.model.versions.get_lang(lang) or []
 
     @staticmethod
     def get_version(lang: str, version: str | None) -> Language | None:
@@ -53,7 +84,7 @@ class Container(MessageContainer):
 @plugin.load_hook
 def on_load() -> None:
     global container
-    container = Container(plugin.app, plugin.model.unalias)
+    container = Container(plugin.app, plugin.model)
 
 
 @plugin.include
@@ -1,9 +1,13 @@
+import typing as t
+
 import crescent
 import hikari
 from result import Err
 
 from bot.display import TextDisplay
+from bot.godbolt import AsmFilter
 from bot.message_container import MessageContainer
+from bot.progress import ProgressiveMessage
 from bot.utils import Plugin
 from bot.version_manager import Language, Provider
 
@@ -13,8 +17,26 @@ container: "Container"
 
 
 class Container(MessageContainer):
-    async def with_code(self, lang: str, version: str | None, code: str) -> TextDisplay:
-        result = await plugin.model.versions.compile(lang, code, version=version)
+    async def with_code(
+        self,
+        lang: str,
+        version: str | None,
+        code: str,
+        progress: ProgressiveMessage | None = None,
+        options: t.Mapping[str, str] | None = None,
+        line_offset: int = 0,
+    ) -> TextDisplay:
+        asm_filter = AsmFilter.parse(options or {})
+        if isinstance(asm_filter, Err):
+            return TextDisplay(error=asm_filter.value)
+
+        # Lines are selected by the user's numbering, not the compiled code's.
+        result = await plugin.model.versions.compile(
+            lang,
+            code,
+            version=version,
+            asm_filter=asm_filter.value and asm_filter.value.shifted(line_offset),
+        )
         if isinstance(result, Err):
             return TextDisplay(
                 error="There was an error while running your code!",
@@ -27,6 +49,11 @@ class Container(MessageContainer):
                 code=result.value.stderr,
             )
 
+        if asm_filter.value and not result.value.asm:
+            return TextDisplay(
+                error=f"No asm was found for {asm_filter.value.describe()}."
+            )
+
         if len(result.value.asm) > 1900:
             output = result.value.asm[:1900] + "..."
         else:
@@ -39,7 +66,7 @@ class Container(MessageContainer):
         return list(
             filter(
                 lambda x: x.provider == Provider.GODBOLT,
-                plugin.model.versions.langs[lang],
+                plugin.model.versions.get_lang(lang) or [],
             )
         )
 
@@ -55,7 +82,7 @@ class Container(MessageContainer):
 @plugin.load_hook
 def on_load() -> None:
     global container
-    container = Container(plugin.app, plugin.model.unalias)
+    container = Container(plugin.app, plugin.model)
 
 
 @plugin.include
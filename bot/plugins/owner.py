@@ -1,8 +1,12 @@
+import datetime
+import importlib
+import importlib.util
 import sys
 import typing as t
 
 import crescent
 
+from bot import curation, fixes
 from bot.config import CONFIG
 from bot.utils import Plugin
 
@@ -15,8 +19,11 @@ owner_group = crescent.Group("owner-only")
 @owner_group.child
 @crescent.command(guild=CONFIG.OWNER_GUILD)
 async def restart(ctx: crescent.Context) -> t.NoReturn:
-    await ctx.respond("Restarting bot...")
+    await ctx.respond(
+        f"Restarting bot once {plugin.model.drain.running} runs in flight finish..."
+    )
     print("Restarting bot because restart was requested.")
+    # Exiting stops the bot, which drains the runs in flight first.
     sys.exit(1)
 
 
@@ -25,3 +32,189 @@ async def restart(ctx: crescent.Context) -> t.NoReturn:
 @crescent.command(guild=CONFIG.OWNER_GUILD)
 async def version_info(ctx: crescent.Context) -> None:
     await ctx.respond(CONFIG.VERSION)
+
+
+@plugin.include
+@owner_group.child
+@crescent.command(guild=CONFIG.OWNER_GUILD)
+async def db_stats(ctx: crescent.Context) -> None:
+    lines = [
+        f"`{name}` {stat.count} queries,"
+        f" avg {stat.average * 1000:.1f}ms, max {stat.max * 1000:.1f}ms"
+        for name, stat in plugin.model.db.stats
+    ]
+    await ctx.respond("\n".join(lines) or "No queries have been run.")
+
+
+@plugin.include
+@owner_group.child
+@crescent.command(guild=CONFIG.OWNER_GUILD)
+async def provider_stats(ctx: crescent.Context) -> None:
+    versions = plugin.model.versions
+    lines: list[str] = []
+
+    for name, pool in (
+        ("Piston", versions.piston.pool),
+        ("Godbolt", versions.godbolt.pool),
+    ):
+        lines.append(f"**{name}**")
+        lines.extend(
+            f"`{backend}` {'healthy' if backend.healthy else 'drained'},"
+            f" {backend.outstanding} outstanding"
+            for backend in pool.backends
+        )
+        if hedging := pool.hedging:
+            lines.append(
+                f"{hedging.requests} requests, hedged {hedging.hedge_rate:.1%},"
+                f" hedges won {hedging.win_rate:.1%}"
+            )
+
+    await ctx.respond("\n".join(lines))
+
+
+@plugin.include
+@owner_group.child
+@crescent.command(guild=CONFIG.OWNER_GUILD)
+async def tasks(ctx: crescent.Context) -> None:
+    lines = [
+        f"`{stat.name}` {stat.count} running, oldest {stat.oldest:.0f}s"
+        for stat in plugin.model.tasks.stats()
+    ]
+    await ctx.respond("\n".join(lines) or "No tasks are running.")
+
+
+@plugin.include
+@owner_group.child
+@crescent.command(name="quotas", guild=CONFIG.OWNER_GUILD)
+class Quotas:
+    guild = crescent.option(
+        str, "Read this guild's quotas from the database again.", default=""
+    )
+
+    async def callback(self, ctx: crescent.Context) -> None:
+        quotas = plugin.model.quotas
+
+        if self.guild:
+            quotas.invalidate(int(self.guild))
+
+        await ctx.respond(
+            f"{quotas.throttled} runs throttled. Users get {quotas.user.burst:g}"
+            f" runs, refilling by {quotas.user.per_minute:g} a minute. Guilds get"
+            f" {quotas.guild.burst:g}, refilling by {quotas.guild.per_minute:g}."
+        )
+
+
+@plugin.include
+@owner_group.child
+@crescent.command(name="history", guild=CONFIG.OWNER_GUILD)
+class History:
+    days = crescent.option(int, "Days of history to look at.", default=7)
+
+    async def callback(self, ctx: crescent.Context) -> None:
+        model = plugin.model
+        since = datetime.timedelta(days=self.days)
+
+        lines = ["**Busiest runtimes**"]
+        lines.extend(
+            f"`{row['language']} {row['version']}` ({row['provider']}) {row['runs']}"
+            f" runs, median {row['median_latency']:.2f}s,"
+            f" p95 {row['p95_latency']:.2f}s, {row['cache_hit_rate']:.0%} cached,"
+            f" {row['error_rate']:.0%} errors"
+            for row in await model.db.busiest_runtimes(since)
+        )
+        lines.append("**Busiest snippets**")
+        lines.extend(
+            f"`{row['code_hash'].hex()[:12]}` {row['language']}, {row['runs']} runs,"
+            f" {row['code_size']} characters, {row['cache_hit_rate']:.0%} cached"
+            for row in await model.db.busiest_snippets(since)
+        )
+
+        if history := model.history:
+            lines.append(
+                f"{history.written} written, {history.dropped} dropped since start"
+            )
+
+        await ctx.respond("\n".join(lines))
+
+
+RELOADABLE_MODULES = (fixes, curation)
+"""Modules that are only looked up at call time, so they can be reloaded."""
+
+
+def _check_source(path: str) -> None:
+    """Raise if a module has a syntax error, before its old version is unloaded."""
+    spec = importlib.util.find_spec(path)
+    if not spec or not spec.origin:
+        raise ModuleNotFoundError(path)
+
+    with open(spec.origin) as f:
+        compile(f.read(), spec.origin, "exec")
+
+
+@plugin.include
+@owner_group.child
+@crescent.command(name="reload", guild=CONFIG.OWNER_GUILD)
+class Reload:
+    plugins = crescent.option(
+        str,
+        "Plugins to reload separated by spaces, or `all`.",
+        default="",
+    )
+    providers = crescent.option(
+        bool, "Read the provider backends from `.env` again.", default=False
+    )
+
+    async def callback(self, ctx: crescent.Context) -> None:
+        await ctx.defer()
+
+        # This plugin may be reloaded itself, which detaches it from the client.
+        client, model = plugin.client, plugin.model
+
+        if self.plugins == "all":
+            paths = list(client.plugins.plugins)
+        else:
+            paths = [f"bot.plugins.{name}" for name in self.plugins.split()]
+
+        if unknown := [path for path in paths if path not in client.plugins.plugins]:
+            await ctx.respond(f"Unknown plugins: {', '.join(unknown)}")
+            return
+
+        # Nothing is reloaded if any module has a syntax error.
+        try:
+            for path in (*(m.__name__ for m in RELOADABLE_MODULES), *paths):
+                _check_source(path)
+        except SyntaxError as e:
+            await ctx.respond(f"Nothing was reloaded, `{e.filename}` is invalid: {e}")
+            return
+
+        for module in RELOADABLE_MODULES:
+            importlib.reload(module)
+        lines = ["Reloaded " + ", ".join(f"`{m.__name__}`" for m in RELOADABLE_MODULES)]
+
+        if paths:
+            for path in paths:
+                client.plugins.load(path, refresh=True)
+            await client.commands.register_commands()
+
+            lines.append("Reloaded " + ", ".join(f"`{path}`" for path in paths))
+
+        if self.providers:
+            try:
+                CONFIG.reload_providers()
+            except (KeyError, ValueError) as e:
+                lines.append(f"The provider settings are invalid: {e!r}")
+            else:
+                await model.versions.reconfigure(
+                    piston_backends=CONFIG.PISTON,
+                    godbolt_backends=CONFIG.GODBOLT,
+                    hedge_budget=CONFIG.HEDGE_BUDGET,
+                )
+                lines.append(
+                    f"Using {len(CONFIG.PISTON)} Piston and {len(CONFIG.GODBOLT)}"
+                    " Godbolt backends"
+                )
+
+        # The catalog is built with the reloaded modules and the current backends.
+        await model.versions.update_once()
+
+        await ctx.respond("\n".join(lines))
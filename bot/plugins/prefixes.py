@@ -1,10 +1,8 @@
-import collections
 import itertools
 
 import crescent
 import hikari
 
-from bot.database import Prefixes
 from bot.display import EmbedBuilder
 from bot.utils import Plugin
 
@@ -19,16 +17,6 @@ admin_group = crescent.Group(
 prefix_group = admin_group.sub_group("prefixes")
 
 
-PREFIX_CACHE: dict[hikari.Snowflake | int, list[str]] = collections.defaultdict(list)
-
-
-@plugin.include
-@crescent.event
-async def on_start(event: hikari.StartedEvent) -> None:
-    for prefix in await Prefixes.fetchmany():
-        PREFIX_CACHE[prefix.guild_id] = prefix.prefixes
-
-
 @plugin.include
 @crescent.command(
     dm_enabled=False,
@@ -36,7 +24,7 @@ async def on_start(event: hikari.StartedEvent) -> None:
 )
 async def prefixes(ctx: crescent.Context) -> None:
     assert ctx.guild_id, "This command can not be used im DMs"
-    prefixes = PREFIX_CACHE[ctx.guild_id]
+    prefixes = await plugin.model.prefixes.get(ctx.guild_id)
 
     embed = EmbedBuilder(title="Prefixes")
 
@@ -57,13 +45,11 @@ async def create(ctx: crescent.Context, prefix: str) -> None:
         await ctx.respond("Prefix must be 32 characters or less.")
         return
 
-    if prefix in PREFIX_CACHE[ctx.guild_id]:
+    if not await plugin.model.db.add_prefix(ctx.guild_id, prefix):
         await ctx.respond(f"`{prefix}` is already a prefix for this guild.")
         return
 
-    PREFIX_CACHE[ctx.guild_id].append(prefix)
-
-    await Prefixes.create_prefix(ctx.guild_id, prefix)
+    plugin.model.prefixes.invalidate(ctx.guild_id)
 
     await ctx.respond(f"`{prefix}` registered as a prefix for this guild.")
 
@@ -76,12 +62,10 @@ async def create(ctx: crescent.Context, prefix: str) -> None:
 async def remove(ctx: crescent.Context, prefix: str) -> None:
     assert ctx.guild_id, "This command can not be used im DMs"
 
-    if prefix not in PREFIX_CACHE[ctx.guild_id]:
+    if not await plugin.model.db.remove_prefix(ctx.guild_id, prefix):
         await ctx.respond(f"`{prefix}` is not a prefix for this guild.")
         return
 
-    PREFIX_CACHE[ctx.guild_id].remove(prefix)
-
-    await Prefixes.remove_prefix(ctx.guild_id, prefix)
+    plugin.model.prefixes.invalidate(ctx.guild_id)
 
     await ctx.respond(f"`{prefix}` removed as a prefix for this guild.")
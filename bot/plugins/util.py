@@ -1,14 +1,13 @@
+import typing as t
+
 import crescent
 import flare
 import hikari
-import more_itertools
-import rapidfuzz
-from miru.ext import nav
 
 from bot.buttons import delete_button
 from bot.config import CONFIG
 from bot.display import EmbedBuilder
-from bot.message_container import bot_messages
+from bot.state import MessageOwner
 from bot.utils import Plugin
 
 plugin = Plugin()
@@ -39,15 +38,18 @@ HELP_EMBEDS = [
 @plugin.include
 @crescent.command(description="List the supported language runtimes.")
 async def languages(ctx: crescent.Context) -> None:
-    langs = list(f"`{lang}`" for lang in plugin.model.versions.langs.keys())
-    langs.sort()
-    out = ", ".join(langs)
+    out = plugin.model.versions.cached(
+        "languages",
+        lambda: ", ".join(sorted(f"`{lang}`" for lang in plugin.model.versions.langs)),
+    )
 
     embed = EmbedBuilder().set_title("Supported Languages").set_description(out).build()
 
     resp = await ctx.respond(embed=embed, ensure_message=True)
 
-    bot_messages[resp.id] = (None, ctx.user.id)
+    await plugin.model.state.set_owner(
+        resp.id, MessageOwner(message_id=None, user_id=ctx.user.id)
+    )
 
 
 @plugin.include
@@ -63,7 +65,9 @@ async def help(ctx: crescent.Context) -> None:
         ensure_message=True,
     )
 
-    bot_messages[resp.id] = (None, ctx.user.id)
+    await plugin.model.state.set_owner(
+        resp.id, MessageOwner(message_id=None, user_id=ctx.user.id)
+    )
 
 
 @plugin.include
@@ -94,24 +98,24 @@ async def on_message(event: hikari.MessageCreateEvent) -> None:
         mentions_reply=False,
     )
 
-    bot_messages[resp.id] = (event.message.id, event.author.id)
+    await plugin.model.state.set_owner(
+        resp.id, MessageOwner(message_id=event.message.id, user_id=event.author.id)
+    )
 
 
 @plugin.include
 @crescent.message_command(name="Delete")
 async def delete(ctx: crescent.Context, message: hikari.Message) -> None:
-    data = bot_messages.get(message.id)
+    owner = await plugin.model.state.get_owner(message.id)
 
-    if not data:
+    if not owner:
         await ctx.respond(
             "I can't delete this message because I don't know who created it.",
             ephemeral=True,
         )
         return
 
-    _user_message, user_id = data
-
-    if not user_id == ctx.user.id:
+    if not owner.user_id == ctx.user.id:
         await ctx.respond(
             "Only the person that used the command can delete the message.",
             ephemeral=True,
@@ -129,6 +133,9 @@ async def delete(ctx: crescent.Context, message: hikari.Message) -> None:
 async def runtime_autocomplete(
     _: crescent.Context, option: hikari.AutocompleteInteractionOption
 ) -> list[hikari.CommandChoice]:
+    # Rarely used, so it isn't imported on startup.
+    import rapidfuzz
+
     return list(
         map(
             lambda x: hikari.CommandChoice(name=x[0], value=x[0]),
@@ -142,6 +149,48 @@ async def runtime_autocomplete(
     )
 
 
+class _RuntimePages(t.Sequence[hikari.Embed]):
+    """Pages of runtimes that are only built once a user pages to them."""
+
+    def __init__(self, title: str, lines: t.Sequence[str], per_page: int = 10) -> None:
+        self.title = title
+        self.lines = lines
+        self.per_page = per_page
+        self._built: dict[int, hikari.Embed] = {}
+
+    def __len__(self) -> int:
+        return -(-len(self.lines) // self.per_page)
+
+    @t.overload
+    def __getitem__(self, index: int) -> hikari.Embed:
+        ...
+
+    @t.overload
+    def __getitem__(self, index: slice) -> t.Sequence[hikari.Embed]:
+        ...
+
+    def __getitem__(
+        self, index: int | slice
+    ) -> hikari.Embed | t.Sequence[hikari.Embed]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        if index not in self._built:
+            start = index * self.per_page
+            self._built[index] = (
+                EmbedBuilder(self.title)
+                .set_description("\n".join(self.lines[start : start + self.per_page]))
+                .build()
+            )
+
+        return self._built[index]
+
+
 @plugin.include
 @crescent.command(
     name="runtimes", description="View the supported runtimes for a language."
@@ -156,23 +205,21 @@ class Runtimes:
             await ctx.respond(f"`{self.lang}` is not a supported language.")
             return
 
-        def build_page_embed(this_page_langs: list[str]) -> hikari.Embed:
-            embed = EmbedBuilder(f"Supported Runtimes for `{runtimes[0].name}`")
-            embed.set_description("\n".join(this_page_langs))
-            return embed.build()
-
-        langs = list(
-            f"{runtime.name}-{runtime.version.replace(' ', '-')}"
-            for runtime in runtimes
+        name = runtimes[0].name
+        langs = plugin.model.versions.cached(
+            ("runtimes", name),
+            lambda: tuple(
+                f"{runtime.name}-{runtime.version.replace(' ', '-')}"
+                for runtime in runtimes
+            ),
         )
+        pages = _RuntimePages(f"Supported Runtimes for `{name}`", langs)
 
         if len(langs) < 10:
-            await ctx.respond(embed=build_page_embed(langs))
+            await ctx.respond(embed=pages[0])
             return
 
-        pages = list(
-            map(build_page_embed, more_itertools.chunked(langs, 10, strict=False))
-        )
+        from miru.ext import nav
 
         nav_ = nav.NavigatorView(pages=pages)
         await nav_.send(ctx.interaction)
@@ -207,4 +254,6 @@ async def info(ctx: crescent.Context) -> None:
         ensure_message=True,
     )
 
-    bot_messages[resp.id] = (None, ctx.user.id)
+    await plugin.model.state.set_owner(
+        resp.id, MessageOwner(message_id=None, user_id=ctx.user.id)
+    )
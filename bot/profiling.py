@@ -0,0 +1,126 @@
+"""
+Startup profiling, enabled with `python -m bot --profile-startup`.
+
+Records how long every module takes to import and how long each startup phase
+takes, then prints a report once the bot has started. When profiling is not
+enabled, `phase` does nothing.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import importlib.abc
+import importlib.machinery
+import sys
+import time
+import types
+import typing as t
+
+__all__: list[str] = ["enable", "is_enabled", "phase", "report"]
+
+_enabled = False
+_started = 0.0
+
+_imports: dict[str, float] = {}
+"""Dictionary of module names to the time spent importing them, minus submodules."""
+_phases: list[tuple[str, float, float]] = []
+"""List of (phase name, start offset, duration)."""
+
+
+class _TimedLoader(importlib.abc.Loader):
+    _stack: t.ClassVar[list[float]] = []
+    """Time spent importing children of the modules that are being imported."""
+
+    def __init__(self, loader: importlib.abc.Loader) -> None:
+        self.loader = loader
+
+    def create_module(
+        self, spec: importlib.machinery.ModuleSpec
+    ) -> types.ModuleType | None:
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: types.ModuleType) -> None:
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            _imports[module.__name__] = elapsed - children
+            if self._stack:
+                self._stack[-1] += elapsed
+
+
+class _TimedFinder(importlib.abc.MetaPathFinder):
+    def find_spec(
+        self,
+        fullname: str,
+        path: t.Sequence[str] | None,
+        target: types.ModuleType | None = None,
+    ) -> importlib.machinery.ModuleSpec | None:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader)
+            return spec
+        return None
+
+
+def enable() -> None:
+    """Start recording. Only modules imported after this are timed."""
+    global _enabled, _started
+    _enabled = True
+    _started = time.perf_counter()
+    sys.meta_path.insert(0, _TimedFinder())
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+@contextlib.contextmanager
+def phase(name: str) -> t.Generator[None, None, None]:
+    """Time a startup phase."""
+    if not _enabled:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, start - _started, time.perf_counter() - start))
+
+
+def report(*, top: int = 25) -> str:
+    lines = [f"Startup took {time.perf_counter() - _started:.3f}s.", "", "Phases:"]
+    lines.extend(
+        f"  {offset:8.3f}s +{duration:.3f}s  {name}"
+        for name, offset, duration in _phases
+    )
+
+    total_imports = sum(_imports.values())
+    lines.extend(["", f"Imports ({len(_imports)} modules, {total_imports:.3f}s):"])
+
+    slowest = sorted(_imports.items(), key=lambda x: x[1], reverse=True)[:top]
+    lines.extend(f"  {elapsed:.4f}s  {name}" for name, elapsed in slowest)
+
+    by_package: dict[str, float] = {}
+    for name, elapsed in _imports.items():
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + elapsed
+
+    lines.extend(["", "Imports by package:"])
+    lines.extend(
+        f"  {elapsed:.4f}s  {name}"
+        for name, elapsed in sorted(
+            by_package.items(), key=lambda x: x[1], reverse=True
+        )[:top]
+    )
+
+    return "\n".join(lines)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import time
+import typing as t
+
+import hikari
+
+from bot.display import TextDisplay
+
+__all__: list[str] = ["ProgressiveMessage"]
+
+
+class ProgressiveMessage:
+    """
+    Shows partial results in a message while they are being produced.
+
+    Updates are rate limited to one REST call per `interval` seconds. Updates that
+    arrive in between replace each other, so only the newest one is shown.
+    """
+
+    def __init__(
+        self,
+        *,
+        interval: float,
+        edit: t.Callable[[hikari.Message, str], t.Awaitable[t.Any]],
+        send: t.Callable[[str], t.Awaitable[hikari.Message]] | None = None,
+        message: hikari.Message | None = None,
+    ) -> None:
+        """`send` creates the message, it is required unless `message` is passed."""
+        self.interval = interval
+        self._send = send
+        self._edit = edit
+        self.message = message
+        """The message showing the progress. `None` until the first update is sent."""
+
+        self._latest: str | None = None
+        self._shown: str | None = None
+        self._last_push = 0.0
+        self._pushing = False
+        self._finished = False
+        self._task: asyncio.Task[None] | None = None
+
+    def update(self, text: TextDisplay) -> None:
+        if self._finished:
+            return
+
+        self._latest = text.format()
+
+        if not self._task or self._task.done():
+            self._task = asyncio.create_task(self._push_later())
+
+    async def finish(self) -> hikari.Message | None:
+        """
+        Stop showing updates. Returns the progress message, which the caller should
+        edit to show the final result, or `None` if no update was ever sent.
+        """
+        self._finished = True
+
+        if task := self._task:
+            # A REST call that is already being made is allowed to finish, so the
+            # message it sends isn't lost.
+            if not self._pushing:
+                task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+        return self.message
+
+    async def _push_later(self) -> None:
+        while self._latest is not None and not self._finished:
+            await asyncio.sleep(
+                max(0, self._last_push + self.interval - time.monotonic())
+            )
+
+            content, self._latest = self._latest, None
+            if content == self._shown:
+                continue
+
+            self._pushing = True
+            try:
+                if self.message:
+                    await self._edit(self.message, content)
+                else:
+                    assert self._send, "A message or a way to send one is required."
+                    self.message = await self._send(content)
+                self._shown = content
+            except hikari.HTTPError:
+                # Progress is best effort, the final result is sent regardless.
+                pass
+            finally:
+                self._pushing = False
+                self._last_push = time.monotonic()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import time
+import typing as t
+
+import cachetools
+
+__all__: list[str] = ["Quota", "QuotaOverride", "Quotas"]
+
+LOG = logging.getLogger(__file__)
+
+OVERRIDE_TTL = 300
+"""Seconds a guild's overrides are cached before they are read again."""
+
+
+class Quota(t.NamedTuple):
+    burst: float
+    """Runs that can be made at once. `0` disables the quota."""
+    per_minute: float
+    """Runs the quota refills by every minute. Has to be positive."""
+
+
+class QuotaOverride(t.NamedTuple):
+    """A guild's quotas. `None` uses the configured quota."""
+
+    user: Quota | None
+    guild: Quota | None
+
+
+class _Bucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float) -> None:
+        self.tokens = tokens
+        self.updated = updated
+
+    def refill(self, quota: Quota, now: float) -> None:
+        self.tokens = min(
+            quota.burst, self.tokens + (now - self.updated) * quota.per_minute / 60
+        )
+        self.updated = now
+
+    def wait(self, quota: Quota) -> float:
+        """Seconds until a token is available."""
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) * 60 / quota.per_minute
+
+
+class Quotas:
+    """
+    Token bucket quotas for runs, per user and per guild.
+
+    A run takes a token from both the user's and the guild's bucket, and is only
+    allowed if both have one. Buckets are kept in an LRU, an evicted bucket starts
+    full again.
+    """
+
+    def __init__(
+        self,
+        *,
+        user: Quota,
+        guild: Quota,
+        load_override: t.Callable[[int], t.Awaitable[QuotaOverride | None]]
+        | None = None,
+        maxsize: int = 100000,
+    ) -> None:
+        self.user = user
+        self.guild = guild
+        self.load_override = load_override
+
+        self._users: cachetools.LRUCache[int, _Bucket] = cachetools.LRUCache(
+            maxsize=maxsize
+        )
+        self._guilds: cachetools.LRUCache[int, _Bucket] = cachetools.LRUCache(
+            maxsize=maxsize
+        )
+        self._overrides = cachetools.TTLCache[int, QuotaOverride | None](
+            maxsize=maxsize, ttl=OVERRIDE_TTL
+        )
+
+        self.throttled = 0
+        """Runs that were turned away."""
+
+    async def acquire(self, user_id: int, guild_id: int | None) -> float | None:
+        """
+        Take a run from the quotas of a user and guild. Returns `None` if the run is
+        allowed, otherwise the seconds until it would be.
+        """
+        user_quota, guild_quota = self.user, self.guild
+
+        if guild_id is not None and (override := await self._override(guild_id)):
+            user_quota = override.user or user_quota
+            guild_quota = override.guild or guild_quota
+
+        now = time.monotonic()
+        buckets: list[tuple[_Bucket, Quota]] = []
+
+        if user_quota.burst > 0:
+            buckets.append(
+                (self._bucket(self._users, user_id, user_quota, now), user_quota)
+            )
+        if guild_id is not None and guild_quota.burst > 0:
+            buckets.append(
+                (self._bucket(self._guilds, guild_id, guild_quota, now), guild_quota)
+            )
+
+        if wait := max((bucket.wait(quota) for bucket, quota in buckets), default=0):
+            self.throttled += 1
+            return wait
+
+        for bucket, _ in buckets:
+            bucket.tokens -= 1
+        return None
+
+    def invalidate(self, guild_id: int) -> None:
+        """Read a guild's overrides from the database the next time they are used."""
+        self._overrides.pop(guild_id, None)
+
+    async def _override(self, guild_id: int) -> QuotaOverride | None:
+        if not self.load_override:
+            return None
+
+        try:
+            return self._overrides[guild_id]
+        except KeyError:
+            pass
+
+        try:
+            override = await self.load_override(guild_id)
+        except Exception as e:
+            # The configured quotas apply until the database answers again, so the
+            # failure isn't cached.
+            LOG.exception(e)
+            return None
+
+        self._overrides[guild_id] = override
+        return override
+
+    @staticmethod
+    def _bucket(
+        buckets: cachetools.LRUCache[int, _Bucket], key: int, quota: Quota, now: float
+    ) -> _Bucket:
+        if (bucket := buckets.get(key)) is None:
+            bucket = buckets[key] = _Bucket(quota.burst, now)
+        else:
+            bucket.refill(quota, now)
+        return bucket
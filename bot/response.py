@@ -11,6 +11,10 @@ class RunResponse:
     output: str | None
     code: int
     signal: str | None
+    note: str | None = None
+    """Shown above the output, for example when a runtime was substituted."""
+    cached: bool = False
+    """True if the result was reused instead of compiled again."""
 
 
 @dataclasses.dataclass(slots=True)
@@ -19,3 +23,5 @@ class ASMResponse:
     asm: str
     stderr: str | None
     code: int
+    cached: bool = False
+    """True if the result was reused instead of compiled again."""
@@ -0,0 +1,12 @@
+from bot.state.base import MESSAGE_TTL, MessageOwner, StateBackend, TrackedMessage
+from bot.state.memory import MemoryState
+from bot.state.postgres import PostgresState
+
+__all__: list[str] = [
+    "MESSAGE_TTL",
+    "MemoryState",
+    "MessageOwner",
+    "PostgresState",
+    "StateBackend",
+    "TrackedMessage",
+]
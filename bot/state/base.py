@@ -0,0 +1,76 @@
+import abc
+import datetime
+import typing as t
+
+import hikari
+
+from bot.tasks import TaskSupervisor
+
+__all__: list[str] = ["MESSAGE_TTL", "MessageOwner", "StateBackend", "TrackedMessage"]
+
+MESSAGE_TTL = datetime.timedelta(minutes=20)
+"""How long message state is remembered for."""
+
+
+class MessageOwner(t.NamedTuple):
+    """Who a bot message belongs to."""
+
+    message_id: hikari.Snowflake | None
+    """The user message the bot message responds to, if any."""
+    user_id: hikari.Snowflake
+    """The user that used the command."""
+
+
+class TrackedMessage(t.NamedTuple):
+    """A user message that has a runner tied to it."""
+
+    response_id: hikari.Snowflake
+    """The bot message that holds the output."""
+    content: str | None
+    """The content of the user message when the runner was created."""
+    guild_id: hikari.Snowflake | None
+
+
+class StateBackend(abc.ABC):
+    """Storage for message state that should outlive a single process."""
+
+    async def start(self, tasks: TaskSupervisor) -> None:
+        """
+        Called once the backend's dependencies are ready. Background jobs run under
+        `tasks`.
+        """
+
+    async def close(self) -> None:
+        """Flush anything that is pending and release resources."""
+
+    @abc.abstractmethod
+    async def get_owner(self, message_id: hikari.Snowflake) -> MessageOwner | None:
+        ...
+
+    @abc.abstractmethod
+    async def set_owner(
+        self, message_id: hikari.Snowflake, owner: MessageOwner
+    ) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def pop_owner(self, message_id: hikari.Snowflake) -> MessageOwner | None:
+        ...
+
+    @abc.abstractmethod
+    async def get_tracked(
+        self, namespace: str, message_id: hikari.Snowflake
+    ) -> TrackedMessage | None:
+        ...
+
+    @abc.abstractmethod
+    async def set_tracked(
+        self, namespace: str, message_id: hikari.Snowflake, tracked: TrackedMessage
+    ) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def pop_tracked(
+        self, namespace: str, message_id: hikari.Snowflake
+    ) -> TrackedMessage | None:
+        ...
@@ -0,0 +1,55 @@
+import typing as t
+
+import cachetools
+import hikari
+
+from bot.state.base import MESSAGE_TTL, MessageOwner, StateBackend, TrackedMessage
+
+__all__: list[str] = ["MemoryState"]
+
+
+def _ttl_cache() -> cachetools.TTLCache[t.Any, t.Any]:
+    return cachetools.TTLCache(maxsize=10000, ttl=MESSAGE_TTL.total_seconds())
+
+
+class MemoryState(StateBackend):
+    """Keeps message state in process memory. Nothing survives a restart."""
+
+    def __init__(self) -> None:
+        self.owners: t.MutableMapping[hikari.Snowflake, MessageOwner] = _ttl_cache()
+        """Dictionary of bot messages to the user message and user that used it."""
+        self.tracked: dict[str, t.MutableMapping[hikari.Snowflake, TrackedMessage]] = {}
+        """Dictionary of namespaces to user messages and their tracked state."""
+
+    def _namespace(
+        self, namespace: str
+    ) -> t.MutableMapping[hikari.Snowflake, TrackedMessage]:
+        if namespace not in self.tracked:
+            self.tracked[namespace] = _ttl_cache()
+        return self.tracked[namespace]
+
+    async def get_owner(self, message_id: hikari.Snowflake) -> MessageOwner | None:
+        return self.owners.get(message_id)
+
+    async def set_owner(
+        self, message_id: hikari.Snowflake, owner: MessageOwner
+    ) -> None:
+        self.owners[message_id] = owner
+
+    async def pop_owner(self, message_id: hikari.Snowflake) -> MessageOwner | None:
+        return self.owners.pop(message_id, None)
+
+    async def get_tracked(
+        self, namespace: str, message_id: hikari.Snowflake
+    ) -> TrackedMessage | None:
+        return self._namespace(namespace).get(message_id)
+
+    async def set_tracked(
+        self, namespace: str, message_id: hikari.Snowflake, tracked: TrackedMessage
+    ) -> None:
+        self._namespace(namespace)[message_id] = tracked
+
+    async def pop_tracked(
+        self, namespace: str, message_id: hikari.Snowflake
+    ) -> TrackedMessage | None:
+        return self._namespace(namespace).pop(message_id, None)
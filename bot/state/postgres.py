@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import datetime
+import logging
+import typing as t
+
+import cachetools
+import hikari
+
+from bot.database import Database
+from bot.state.base import MESSAGE_TTL, MessageOwner, StateBackend, TrackedMessage
+from bot.tasks import TaskSupervisor
+
+__all__: list[str] = ["PostgresState"]
+
+LOG = logging.getLogger(__file__)
+
+_OWNER_NAMESPACE = "owner"
+
+FETCH_TTL = 1.0
+"""Seconds a lookup of a message's rows is shared for."""
+
+_UPSERT = """
+INSERT INTO message_state
+    (namespace, message_id, linked_id, user_id, guild_id, content, expires_at)
+VALUES ($1, $2, $3, $4, $5, $6, $7)
+ON CONFLICT (namespace, message_id) DO UPDATE SET
+    linked_id = EXCLUDED.linked_id,
+    user_id = EXCLUDED.user_id,
+    guild_id = EXCLUDED.guild_id,
+    content = EXCLUDED.content,
+    expires_at = EXCLUDED.expires_at
+"""
+
+_SELECT = """
+SELECT namespace, linked_id, user_id, guild_id, content FROM message_state
+WHERE message_id = $1 AND expires_at > now()
+"""
+
+_SELECT_LIVE = """
+SELECT message_id, max(expires_at) AS expires_at FROM message_state
+WHERE expires_at > now() GROUP BY message_id
+"""
+
+_DELETE = """
+DELETE FROM message_state WHERE namespace = $1 AND message_id = $2
+RETURNING linked_id, user_id, guild_id, content, expires_at > now() AS live
+"""
+
+_SWEEP = "DELETE FROM message_state WHERE expires_at <= now()"
+
+
+class _Row(t.NamedTuple):
+    linked_id: int | None
+    user_id: int | None
+    guild_id: int | None
+    content: str | None
+    expires_at: datetime.datetime
+
+
+def _snowflake_or_none(value: int | None) -> hikari.Snowflake | None:
+    if value is None:
+        return None
+    return hikari.Snowflake(value)
+
+
+def _to_owner(row: t.Mapping[str, t.Any]) -> MessageOwner:
+    return MessageOwner(
+        message_id=_snowflake_or_none(row["linked_id"]),
+        user_id=hikari.Snowflake(row["user_id"]),
+    )
+
+
+def _to_tracked(row: t.Mapping[str, t.Any]) -> TrackedMessage:
+    return TrackedMessage(
+        response_id=hikari.Snowflake(row["linked_id"]),
+        content=row["content"],
+        guild_id=_snowflake_or_none(row["guild_id"]),
+    )
+
+
+class PostgresState(StateBackend):
+    """
+    Keeps message state in an unlogged Postgres table so it is shared between
+    processes and survives restarts.
+
+    Writes are buffered and flushed in batches. Reads check the buffer first, so a
+    process always sees its own writes.
+
+    Every edit and delete the bot sees is looked up, and nearly all of them are for
+    messages without state. The expiry of every message with state is kept in
+    memory, so those lookups never reach the database. The events of a message go
+    to the process of its guild's shard, which either wrote its state or loaded it
+    on start.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        *,
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+        sweep_interval: float = 60.0,
+    ) -> None:
+        self.db = db
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.sweep_interval = sweep_interval
+
+        self._pending: dict[tuple[str, int], _Row] = {}
+        self._expiry: dict[int, datetime.datetime] = {}
+        """When the state of each message that has any expires."""
+        self._fetching = cachetools.TTLCache[
+            int, asyncio.Future[dict[str, t.Mapping[str, t.Any]]]
+        ](maxsize=1024, ttl=FETCH_TTL)
+        """
+        Recent lookups of every row of a message. Each container looks up the same
+        message for the same event, so they share a single query.
+        """
+        self._flush_now = asyncio.Event()
+        self._tasks: list[asyncio.Task[t.NoReturn]] = []
+
+    async def start(self, tasks: TaskSupervisor) -> None:
+        rows = await self.db.query_rows("state_load", _SELECT_LIVE)
+        self._expiry = {row["message_id"]: row["expires_at"] for row in rows}
+        self._tasks = [
+            tasks.supervise(self._flush_loop, name="state flush"),
+            tasks.supervise(self._sweep_loop, name="state sweep"),
+        ]
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        self._tasks.clear()
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered row in a single batch."""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+
+        assert self.db.pool, "Database has not been started"
+        try:
+            async with self.db.pool.acquire() as con:
+                async with con.transaction():
+                    await con.con.executemany(  # type: ignore
+                        _UPSERT,
+                        [
+                            (namespace, id, *row)
+                            for (namespace, id), row in batch.items()
+                        ],
+                    )
+        except BaseException as e:
+            # Rows written since the batch was taken are newer, so they win. The
+            # batch is also kept if the flush is cancelled, so `close` writes it.
+            for key, row in batch.items():
+                self._pending.setdefault(key, row)
+            if isinstance(e, Exception):
+                LOG.exception(e)
+                return
+            raise
+
+    async def _flush_loop(self) -> t.NoReturn:
+        while True:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+            self._flush_now.clear()
+            await self.flush()
+
+    async def _sweep_loop(self) -> t.NoReturn:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            now = datetime.datetime.now(datetime.UTC)
+            self._expiry = {
+                id: expires_at
+                for id, expires_at in self._expiry.items()
+                if expires_at > now
+            }
+            try:
+                await self.db.execute(_SWEEP, [])
+            except Exception as e:
+                LOG.exception(e)
+
+    def _write(self, namespace: str, message_id: int, row: _Row) -> None:
+        self._pending[(namespace, message_id)] = row
+        self._fetching.pop(message_id, None)
+        # Rows written later always expire later.
+        self._expiry[message_id] = row.expires_at
+        if len(self._pending) >= self.batch_size:
+            self._flush_now.set()
+
+    def _read_pending(self, namespace: str, message_id: int) -> _Row | None:
+        row = self._pending.get((namespace, message_id))
+        if row and row.expires_at <= datetime.datetime.now(datetime.UTC):
+            return None
+        return row
+
+    @staticmethod
+    def _expires_at() -> datetime.datetime:
+        return datetime.datetime.now(datetime.UTC) + MESSAGE_TTL
+
+    def _has_state(self, message_id: int) -> bool:
+        expires_at = self._expiry.get(message_id)
+        return expires_at is not None and expires_at > datetime.datetime.now(
+            datetime.UTC
+        )
+
+    async def _rows(self, message_id: int) -> dict[str, t.Mapping[str, t.Any]]:
+        """Every row of a message, by namespace."""
+        if (fetch := self._fetching.get(message_id)) is None:
+            fetch = asyncio.ensure_future(self._fetch_rows(message_id))
+            self._fetching[message_id] = fetch
+
+            def forget_failed(_: object) -> None:
+                if (fetch.cancelled() or fetch.exception()) and self._fetching.get(
+                    message_id
+                ) is fetch:
+                    del self._fetching[message_id]
+
+            fetch.add_done_callback(forget_failed)
+
+        # Shielded, so one caller being cancelled doesn't cancel the others.
+        return await asyncio.shield(fetch)
+
+    async def _fetch_rows(self, message_id: int) -> dict[str, t.Mapping[str, t.Any]]:
+        rows = await self.db.query_rows("state_get", _SELECT, message_id)
+        return {row["namespace"]: row for row in rows}
+
+    async def _get(
+        self, namespace: str, message_id: int
+    ) -> t.Mapping[str, t.Any] | None:
+        if row := self._read_pending(namespace, message_id):
+            return row._asdict()
+        if not self._has_state(message_id):
+            return None
+        return (await self._rows(message_id)).get(namespace)
+
+    async def _pop(
+        self, namespace: str, message_id: int
+    ) -> t.Mapping[str, t.Any] | None:
+        pending = self._read_pending(namespace, message_id)
+        self._pending.pop((namespace, message_id), None)
+        self._fetching.pop(message_id, None)
+
+        if not self._has_state(message_id):
+            return None
+
+        stored = await self.db.query_row("state_pop", _DELETE, namespace, message_id)
+
+        if pending:
+            return pending._asdict()
+        if stored and stored["live"]:
+            return stored
+        return None
+
+    async def get_owner(self, message_id: hikari.Snowflake) -> MessageOwner | None:
+        row = await self._get(_OWNER_NAMESPACE, message_id)
+        return _to_owner(row) if row else None
+
+    async def set_owner(
+        self, message_id: hikari.Snowflake, owner: MessageOwner
+    ) -> None:
+        self._write(
+            _OWNER_NAMESPACE,
+            message_id,
+            _Row(
+                linked_id=owner.message_id,
+                user_id=owner.user_id,
+                guild_id=None,
+                content=None,
+                expires_at=self._expires_at(),
+            ),
+        )
+
+    async def pop_owner(self, message_id: hikari.Snowflake) -> MessageOwner | None:
+        row = await self._pop(_OWNER_NAMESPACE, message_id)
+        return _to_owner(row) if row else None
+
+    async def get_tracked(
+        self, namespace: str, message_id: hikari.Snowflake
+    ) -> TrackedMessage | None:
+        row = await self._get(namespace, message_id)
+        return _to_tracked(row) if row else None
+
+    async def set_tracked(
+        self, namespace: str, message_id: hikari.Snowflake, tracked: TrackedMessage
+    ) -> None:
+        self._write(
+            namespace,
+            message_id,
+            _Row(
+                linked_id=tracked.response_id,
+                user_id=None,
+                guild_id=tracked.guild_id,
+                content=tracked.content,
+                expires_at=self._expires_at(),
+            ),
+        )
+
+    async def pop_tracked(
+        self, namespace: str, message_id: hikari.Snowflake
+    ) -> TrackedMessage | None:
+        row = await self._pop(namespace, message_id)
+        return _to_tracked(row) if row else None
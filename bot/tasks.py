@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import time
+import typing as t
+
+__all__: list[str] = ["TaskStats", "TaskSupervisor"]
+
+LOG = logging.getLogger(__file__)
+
+
+@dataclasses.dataclass(slots=True)
+class TaskStats:
+    name: str
+    count: int
+    oldest: float
+    """Age of the oldest task in seconds."""
+
+
+class TaskSupervisor:
+    """
+    Owns the background tasks of the bot.
+
+    Tasks are strongly referenced until they finish, so they can't be garbage
+    collected, and their exceptions are logged. Long running jobs are restarted with
+    exponential backoff if they crash.
+    """
+
+    def __init__(self, *, max_pending: int = 1000) -> None:
+        self.max_pending = max_pending
+        """Fire-and-forget tasks that may be pending at once."""
+
+        self._pending: dict[asyncio.Task[t.Any], tuple[str, float]] = {}
+        """Fire-and-forget tasks to their name and start time."""
+        self._jobs: dict[asyncio.Task[t.NoReturn], tuple[str, float]] = {}
+        """Supervised jobs to their name and start time."""
+        self._closing = False
+
+    def spawn(
+        self, coro: t.Coroutine[t.Any, t.Any, t.Any], *, name: str
+    ) -> asyncio.Task[t.Any] | None:
+        """
+        Run a coroutine in the background. Returns `None` and drops the coroutine if
+        too many tasks are pending or the supervisor is closing.
+        """
+        if self._closing or len(self._pending) >= self.max_pending:
+            LOG.warning(f"Dropping task `{name}`, {len(self._pending)} are pending.")
+            coro.close()
+            return None
+
+        task = asyncio.create_task(coro, name=name)
+        self._pending[task] = (name, time.monotonic())
+        task.add_done_callback(self._on_done)
+        return task
+
+    def supervise(
+        self,
+        job: t.Callable[[], t.Awaitable[t.Any]],
+        *,
+        name: str,
+        min_backoff: float = 1,
+        max_backoff: float = 300,
+    ) -> asyncio.Task[t.NoReturn]:
+        """
+        Keep a long running job alive. If it crashes or returns, it is started again
+        after a delay that doubles every time, up to `max_backoff`. The delay is
+        reset once the job has been running for `max_backoff` seconds.
+
+        The job runs until the supervisor closes or the returned task is cancelled.
+        """
+
+        async def run() -> t.NoReturn:
+            backoff = min_backoff
+
+            while True:
+                started = time.monotonic()
+                try:
+                    await job()
+                except Exception as e:
+                    LOG.exception(e)
+
+                if time.monotonic() - started >= max_backoff:
+                    backoff = min_backoff
+
+                LOG.warning(f"Job `{name}` stopped, restarting in {backoff}s.")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+
+        task = asyncio.create_task(run(), name=name)
+        self._jobs[task] = (name, time.monotonic())
+        task.add_done_callback(lambda _: self._jobs.pop(task, None))
+        return task
+
+    async def close(self, timeout: float = 10) -> None:
+        """
+        Stop the supervised jobs and wait up to `timeout` seconds for pending tasks
+        to finish. Tasks still pending after that are cancelled.
+        """
+        self._closing = True
+
+        jobs = list(self._jobs)
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        self._jobs.clear()
+
+        if not self._pending:
+            return
+
+        _, pending = await asyncio.wait(list(self._pending), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            LOG.warning(f"Cancelled {len(pending)} tasks that didn't finish in time.")
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> list[TaskStats]:
+        """Amount of running tasks and the age of the oldest one, by name."""
+        now = time.monotonic()
+        started: dict[str, list[float]] = {}
+
+        for name, start in (*self._jobs.values(), *self._pending.values()):
+            started.setdefault(name, []).append(start)
+
+        return sorted(
+            (
+                TaskStats(name=name, count=len(starts), oldest=now - min(starts))
+                for name, starts in started.items()
+            ),
+            key=lambda s: s.count,
+            reverse=True,
+        )
+
+    def _on_done(self, task: asyncio.Task[t.Any]) -> None:
+        self._pending.pop(task, None)
+
+        if not task.cancelled() and (e := task.exception()):
+            LOG.error(f"Task `{task.get_name()}` failed.", exc_info=e)
@@ -3,24 +3,44 @@ from __future__ import annotations
 import asyncio
 import collections
 import dataclasses
+import datetime
 import enum
+import hashlib
 import logging
+import sys
+import time
 import typing as t
 
-from result import Err, Result
+import aiohttp
+from result import Err, Ok, Result
 
-from bot import godbolt, piston
+from bot import curation, godbolt, piston
+from bot.circuit_breaker import CircuitBreaker
+from bot.config import BackendConfig
+from bot.database import Execution, ExecutionHistory
+from bot.hedging import HedgePolicy
 from bot.response import ASMResponse, RunResponse
+from bot.tasks import TaskSupervisor
 
 LOG = logging.getLogger(__file__)
 
+T = t.TypeVar("T")
+
 
 class Provider(enum.Enum):
     GODBOLT = enum.auto()
     PISTON = enum.auto()
 
+    @property
+    def display_name(self) -> str:
+        match self:
+            case Provider.GODBOLT:
+                return "Compiler Explorer"
+            case Provider.PISTON:
+                return "Piston"
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(slots=True)
 class Language:
     provider: Provider
     """The API that can run this language."""
@@ -62,18 +82,33 @@ def _sort_langs_inplace(langs: list[Language]) -> None:
     langs.sort(key=f, reverse=True)
 
 
-def latest_of_type(langs: list[Language], name: str, amount: int) -> list[Language]:
-    """`langs` is a sorted list."""
-    out: list[Language] = []
+def _build_index(
+    langs: dict[str, list[Language]], aliases: dict[Provider, dict[str, str]]
+) -> dict[str, str]:
+    """
+    Map names, aliases and file extensions to language names. Names take priority
+    over aliases, and Piston's aliases over Godbolt's file extensions. Entries for
+    languages that aren't in the catalog are left out.
+    """
+    index: dict[str, str] = {}
+
+    for provider in (Provider.GODBOLT, Provider.PISTON):
+        for alias, name in aliases.get(provider, {}).items():
+            if name in langs:
+                index[sys.intern(alias.lower())] = name
+
+    for name in langs:
+        index[name.lower()] = name
 
-    for lang in langs:
-        if lang.full_name.startswith(name):
-            out += [lang]
+    return index
 
-        if len(out) == amount:
-            break
 
-    return out
+def _catalog_key(langs: dict[str, list[Language]]) -> list[tuple[t.Any, ...]]:
+    return [
+        (name, lang.provider, lang.version, lang.full_name, lang.internal_id)
+        for name, versions in langs.items()
+        for lang in versions
+    ]
 
 
 class VersionManager:
@@ -85,20 +120,78 @@ class VersionManager:
 
         self.langs: dict[str, list[Language]] = {}
         """Dictionary of language names to Language objects."""
+        self.index: dict[str, str] = {}
+        """
+        Dictionary of every name, alias and file extension to the language name it
+        refers to. Rebuilt with the catalog.
+        """
+        self._aliases: dict[Provider, dict[str, str]] = {}
+        """The aliases and file extensions each provider reported last."""
+
+        self.breakers = {provider: CircuitBreaker() for provider in Provider}
+        """Health of each provider."""
+
+        self.snapshot = 0
+        """Incremented every time the catalog changes."""
+        self._rendered: dict[t.Hashable, t.Any] = {}
+        """Artifacts rendered from the current snapshot of the catalog."""
+
+        self.history: ExecutionHistory | None = None
+        """Where executions are recorded. `None` if they aren't."""
 
     @classmethod
     async def build(
         cls,
         *,
-        piston_url: str,
-        godbolt_url: str,
+        piston_backends: t.Sequence[BackendConfig],
+        godbolt_backends: t.Sequence[BackendConfig],
+        tasks: TaskSupervisor,
+        hedge_budget: float = 0,
     ) -> t.Self:
+        """
+        `hedge_budget` is the fraction of requests that may be sent to a second
+        backend when they are slow. `0` disables hedging. The health checks of the
+        backends run under `tasks`.
+        """
         self = cls()
-        self._godbolt = await godbolt.Client.build(godbolt_url)
-        self._piston = await piston.Client.build(piston_url)
-        asyncio.create_task(self.update())
+        self._godbolt = await godbolt.Client.build(
+            godbolt_backends, tasks, HedgePolicy(hedge_budget) if hedge_budget else None
+        )
+        self._piston = await piston.Client.build(
+            piston_backends, tasks, HedgePolicy(hedge_budget) if hedge_budget else None
+        )
         return self
 
+    async def reconfigure(
+        self,
+        *,
+        piston_backends: t.Sequence[BackendConfig],
+        godbolt_backends: t.Sequence[BackendConfig],
+        hedge_budget: float = 0,
+    ) -> None:
+        """
+        Swap the backends of both providers without closing the connections of the
+        backends that are kept. The catalog is refreshed by the caller.
+        """
+        for pool in (self.godbolt.pool, self.piston.pool):
+            if not hedge_budget:
+                pool.hedging = None
+            elif pool.hedging:
+                pool.hedging.budget = hedge_budget
+            else:
+                pool.hedging = HedgePolicy(hedge_budget)
+
+        await asyncio.gather(
+            self.godbolt.pool.reconfigure(godbolt_backends),
+            self.piston.pool.reconfigure(piston_backends),
+        )
+
+    async def close(self) -> None:
+        if self._godbolt:
+            await self._godbolt.close()
+        if self._piston:
+            await self._piston.close()
+
     @property
     def godbolt(self) -> godbolt.Client:
         assert self._godbolt
@@ -109,80 +202,126 @@ class VersionManager:
         assert self._piston
         return self._piston
 
+    def resolve(self, name: str) -> str:
+        """The name of the language `name` refers to, by name, alias or extension."""
+        return self.index.get(name.lower(), name)
+
     def get_lang(self, lang: str) -> list[Language] | None:
-        lang = self.piston.unalias(lang)
-        return self.langs.get(lang)
+        return self.langs.get(self.resolve(lang))
 
     async def update(self) -> t.NoReturn:
+        """Refresh the catalog every five minutes."""
         while True:
-            try:
-                await self.godbolt.update_data()
-            except Exception as e:
-                LOG.exception(e)
-
-            try:
-                await self.piston.update_data()
-            except Exception as e:
-                LOG.exception(e)
-
-            self.langs = collections.defaultdict(list)
-
-            for compiler in self.godbolt.compilers:
-                lang = Language(
-                    provider=Provider.GODBOLT,
-                    name=compiler.lang,
-                    full_name=compiler.name,
-                    version=compiler.semver,
-                    is_executable=True,
-                    is_explorable=True,
-                    internal_id=compiler.id,
-                )
-                if lang not in self.langs[compiler.lang]:
-                    self.langs[compiler.lang].append(lang)
-
-            for runtime in self.piston.runtimes:
-                lang = Language(
-                    provider=Provider.PISTON,
-                    name=runtime.language,
-                    full_name=f"{runtime.language} {runtime.version}",
-                    version=runtime.version,
-                    is_executable=True,
-                    is_explorable=False,
-                )
-                if lang not in self.langs[runtime.language]:
-                    self.langs[runtime.language].append(lang)
-
-            for langs in self.langs.values():
-                _sort_langs_inplace(langs)
-
-            # Because there are so many C/++ versions only a few are selected.
-
-            # fmt: off
-            self.langs["c"] = latest_of_type(
-                self.langs["c"], "x86-64 clang", 2,
-            ) + latest_of_type(
-                self.langs["c"], "x86-64 gcc", 2,
-            ) + latest_of_type(
-                self.langs["c"], "x86-64 icx", 1,
-            ) + latest_of_type(
-                self.langs["c"], "x86-64 icc", 1,
-            )
+            await self.update_once()
+            await asyncio.sleep(60 * 5)
 
-            self.langs["c++"] = latest_of_type(
-                self.langs["c++"], "x86-64 clang", 2,
-            ) + latest_of_type(
-                self.langs["c++"], "x86-64 gcc", 2,
-            ) + latest_of_type(
-                self.langs["c++"], "x86-64 icx", 1,
-            ) + latest_of_type(
-                self.langs["c++"], "x86-64 icc", 1,
+    async def update_once(self) -> None:
+        """Rebuild the catalog from both providers."""
+        langs: dict[str, list[Language]] = collections.defaultdict(list)
+        seen: set[tuple[str, str]] = set()
+
+        def add(lang: Language) -> None:
+            if (lang.name, lang.version) not in seen:
+                seen.add((lang.name, lang.version))
+                langs[lang.name].append(lang)
+
+        aliases: dict[Provider, dict[str, str]] = {}
+
+        # The raw provider lists are only kept while the catalog is built. If a
+        # provider can't be reached, its entries from the last catalog are kept.
+        try:
+            compilers, languages = await asyncio.gather(
+                self.godbolt.get_compilers(),
+                self.godbolt.get_languages(),
+                return_exceptions=True,
             )
-            # fmt: on
+            if isinstance(compilers, BaseException):
+                raise compilers
 
-            await asyncio.sleep(60 * 5)
+            # The file extensions are only used to resolve names, so if they can't be
+            # fetched the last ones are kept instead of dropping the compilers.
+            if isinstance(languages, BaseException):
+                LOG.warning(f"Could not fetch Godbolt languages: {languages!r}")
+            else:
+                aliases[Provider.GODBOLT] = {
+                    extension.removeprefix("."): language.id
+                    for language in languages
+                    for extension in language.extensions
+                }
+
+            for compiler in compilers:
+                add(
+                    Language(
+                        provider=Provider.GODBOLT,
+                        name=compiler.lang,
+                        full_name=compiler.name,
+                        version=compiler.semver,
+                        is_executable=True,
+                        is_explorable=True,
+                        internal_id=compiler.id,
+                    )
+                )
+        except Exception as e:
+            LOG.exception(e)
+            self._keep_provider(Provider.GODBOLT, add)
+
+        try:
+            runtimes = await self.piston.get_runtimes()
+            aliases[Provider.PISTON] = {
+                alias: runtime.language
+                for runtime in runtimes
+                for alias in runtime.aliases
+            }
+
+            for runtime in runtimes:
+                add(
+                    Language(
+                        provider=Provider.PISTON,
+                        name=runtime.language,
+                        full_name=sys.intern(f"{runtime.language} {runtime.version}"),
+                        version=runtime.version,
+                        is_executable=True,
+                        is_explorable=False,
+                    )
+                )
+        except Exception as e:
+            LOG.exception(e)
+            self._keep_provider(Provider.PISTON, add)
+
+        for versions in langs.values():
+            _sort_langs_inplace(versions)
+
+        # Looked up on the module every time, so reloading it takes effect.
+        curation.curate(langs)
+
+        if _catalog_key(langs) != _catalog_key(self.langs):
+            self.snapshot += 1
+            self._rendered.clear()
+
+        self._aliases.update(aliases)
+        # Curation can leave languages without any versions.
+        self.langs = {name: versions for name, versions in langs.items() if versions}
+        self.index = _build_index(self.langs, self._aliases)
+
+    def cached(self, key: t.Hashable, render: t.Callable[[], T]) -> T:
+        """
+        Return something rendered from the catalog, rendering it the first time it
+        is asked for. Everything is thrown away when the catalog changes.
+        """
+        if key not in self._rendered:
+            self._rendered[key] = render()
+        return self._rendered[key]
+
+    def _keep_provider(
+        self, provider: Provider, add: t.Callable[[Language], None]
+    ) -> None:
+        for versions in self.langs.values():
+            for lang in versions:
+                if lang.provider == provider:
+                    add(lang)
 
     def find_version(self, lang: str, version: str | None = None) -> Language | None:
-        versions = self.langs[lang]
+        versions = self.get_lang(lang)
 
         language: Language
 
@@ -201,14 +340,90 @@ class VersionManager:
 
         return language
 
-    async def execute(
-        self, lang: str, code: str, version: str | None = None
-    ) -> Result[RunResponse, str]:
-        language = self.find_version(lang, version=version)
+    def _equivalents(self, language: Language) -> list[Language]:
+        """Runtimes of the same language on other providers, newest first."""
+        others: list[Language] = []
+        seen: set[Provider] = {language.provider}
+
+        for lang in self.langs.get(language.name, []):
+            if lang.provider not in seen and lang.is_executable:
+                seen.add(lang.provider)
+                others.append(lang)
+
+        return others
+
+    async def _call(
+        self,
+        language: Language,
+        request: t.Callable[[], t.Awaitable[Result[T, str]]],
+    ) -> Result[T, str] | None:
+        """
+        Send a request to the language's provider through its circuit breaker.
+        Returns `None` if the circuit is open or the provider couldn't be reached.
+
+        Only transport errors, timeouts and server errors count against the
+        provider. An `Err` is about the request, so it is returned as it is.
+        """
+        breaker = self.breakers[language.provider]
+
+        if not breaker.allow():
+            return None
 
-        if not language:
-            return Err("No matching language found.")
+        start = time.monotonic()
+        result: Result[T, str] | None = None
+        try:
+            result = await request()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            LOG.exception(e)
+        finally:
+            breaker.record(
+                succeeded=result is not None, latency=time.monotonic() - start
+            )
 
+        return result
+
+    def _record(
+        self,
+        kind: str,
+        language: Language,
+        code: str,
+        result: Result[RunResponse, str] | Result[ASMResponse, str],
+        start: float,
+    ) -> None:
+        if not self.history:
+            return
+
+        response = result.value if isinstance(result, Ok) else None
+        match response:
+            case RunResponse():
+                output = response.output or ""
+            case ASMResponse():
+                output = response.asm
+            case None:
+                output = ""
+
+        self.history.record(
+            Execution(
+                ran_at=datetime.datetime.now(datetime.UTC),
+                kind=kind,
+                language=language.name,
+                version=language.version,
+                provider=language.provider.name.lower(),
+                code_hash=hashlib.sha256(code.encode()).digest(),
+                code_size=len(code),
+                output_size=len(output),
+                latency=time.monotonic() - start,
+                exit_code=response.code if response else None,
+                cache_hit=response.cached if response else False,
+            )
+        )
+
+    async def _execute_on(
+        self,
+        language: Language,
+        code: str,
+        on_output: t.Callable[[str], None] | None,
+    ) -> Result[RunResponse, str]:
         match language.provider:
             case Provider.GODBOLT:
                 assert language.internal_id, "GODBOLT langs should have an internal ID."
@@ -216,11 +431,64 @@ class VersionManager:
                     language.name, language.internal_id, code
                 )
             case Provider.PISTON:
+                if on_output:
+                    return await self.piston.stream(
+                        language.name, language.version, code, on_output
+                    )
                 return await self.piston.execute(language.name, language.version, code)
 
+    async def execute(
+        self,
+        lang: str,
+        code: str,
+        version: str | None = None,
+        *,
+        on_output: t.Callable[[str], None] | None = None,
+    ) -> Result[RunResponse, str]:
+        """
+        Run code. If `on_output` is passed, it is called with the output so far while
+        the code runs, on providers that can stream output.
+        """
+        language = self.find_version(lang, version=version)
+
+        if not language:
+            return Err("No matching language found.")
+
+        start = time.monotonic()
+
+        # If the provider is down, the code is run by an equivalent runtime on
+        # another provider.
+        for candidate in [language, *self._equivalents(language)]:
+            result = await self._call(
+                candidate, lambda: self._execute_on(candidate, code, on_output)
+            )
+
+            if result is None:
+                continue
+
+            if isinstance(result, Ok) and candidate is not language:
+                result.value.note = (
+                    f"{language.provider.display_name} is unavailable, so this ran"
+                    f" on `{candidate.full_name}` instead."
+                )
+
+            self._record("execute", candidate, code, result, start)
+            return result
+
+        return Err(
+            f"{language.provider.display_name} is currently unavailable."
+            " Please try again later."
+        )
+
     async def compile(
-        self, lang: str, code: str, version: str | None = None
+        self,
+        lang: str,
+        code: str,
+        version: str | None = None,
+        *,
+        asm_filter: godbolt.AsmFilter | None = None,
     ) -> Result[ASMResponse, str]:
+        """`asm_filter` keeps only the selected functions or source lines."""
         language = self.find_version(lang, version=version)
 
         if not language:
@@ -228,9 +496,23 @@ class VersionManager:
 
         match language.provider:
             case Provider.GODBOLT:
-                assert language.internal_id, "GODBOLT langs should have an internal ID."
-                return await self.godbolt.compile(
-                    language.name, language.internal_id, code
+                internal_id = language.internal_id
+                assert internal_id, "GODBOLT langs should have an internal ID."
+                start = time.monotonic()
+                result = await self._call(
+                    language,
+                    lambda: self.godbolt.compile(
+                        language.name,
+                        internal_id,
+                        code,
+                        asm_filter=asm_filter,
+                    ),
+                )
+                if result:
+                    self._record("compile", language, code, result, start)
+                return result or Err(
+                    f"{language.provider.display_name} is currently unavailable."
+                    " Please try again later."
                 )
             case Provider.PISTON:
                 return Err(f"ASM inspection is not supported for {language.name}.")
@@ -0,0 +1,8 @@
+CREATE TABLE guild_quotas ();
+ALTER TABLE guild_quotas ADD COLUMN guild_id BIGINT;
+ALTER TABLE guild_quotas ADD COLUMN user_burst REAL;
+ALTER TABLE guild_quotas ADD COLUMN user_per_minute REAL;
+ALTER TABLE guild_quotas ADD COLUMN guild_burst REAL;
+ALTER TABLE guild_quotas ADD COLUMN guild_per_minute REAL;
+ALTER TABLE guild_quotas ALTER COLUMN guild_id SET NOT NULL;
+ALTER TABLE guild_quotas ADD CONSTRAINT _guild_quotas_guild_id_primary_key PRIMARY KEY ( guild_id );
\ No newline at end of file
@@ -0,0 +1,26 @@
+CREATE TABLE executions ();
+ALTER TABLE executions ADD COLUMN id BIGSERIAL;
+ALTER TABLE executions ADD COLUMN ran_at TIMESTAMPTZ;
+ALTER TABLE executions ADD COLUMN kind VARCHAR(16);
+ALTER TABLE executions ADD COLUMN language VARCHAR(64);
+ALTER TABLE executions ADD COLUMN version VARCHAR(64);
+ALTER TABLE executions ADD COLUMN provider VARCHAR(16);
+ALTER TABLE executions ADD COLUMN code_hash BYTEA;
+ALTER TABLE executions ADD COLUMN code_size INTEGER;
+ALTER TABLE executions ADD COLUMN output_size INTEGER;
+ALTER TABLE executions ADD COLUMN latency REAL;
+ALTER TABLE executions ADD COLUMN exit_code INTEGER;
+ALTER TABLE executions ADD COLUMN cache_hit BOOLEAN;
+ALTER TABLE executions ALTER COLUMN id SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN ran_at SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN kind SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN language SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN version SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN provider SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN code_hash SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN code_size SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN output_size SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN latency SET NOT NULL;
+ALTER TABLE executions ALTER COLUMN cache_hit SET NOT NULL;
+CREATE INDEX _brin_index_executions__ran_at ON executions USING BRIN ( ( ran_at ) );
+ALTER TABLE executions ADD CONSTRAINT _executions_id_primary_key PRIMARY KEY ( id );
\ No newline at end of file
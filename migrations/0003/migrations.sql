@@ -0,0 +1,18 @@
+-- Older versions created this table on startup. It only holds message state that
+-- expires within minutes, so it is dropped and recreated.
+DROP TABLE IF EXISTS message_state;
+-- Unlogged, so writes skip the WAL. The table is truncated after a crash, but
+-- survives clean restarts.
+CREATE UNLOGGED TABLE message_state ();
+ALTER TABLE message_state ADD COLUMN namespace TEXT;
+ALTER TABLE message_state ADD COLUMN message_id BIGINT;
+ALTER TABLE message_state ADD COLUMN linked_id BIGINT;
+ALTER TABLE message_state ADD COLUMN user_id BIGINT;
+ALTER TABLE message_state ADD COLUMN guild_id BIGINT;
+ALTER TABLE message_state ADD COLUMN content TEXT;
+ALTER TABLE message_state ADD COLUMN expires_at TIMESTAMPTZ;
+ALTER TABLE message_state ALTER COLUMN namespace SET NOT NULL;
+ALTER TABLE message_state ALTER COLUMN message_id SET NOT NULL;
+ALTER TABLE message_state ALTER COLUMN expires_at SET NOT NULL;
+CREATE INDEX _btree_index_message_state__expires_at ON message_state USING BTREE ( ( expires_at ) );
+ALTER TABLE message_state ADD CONSTRAINT _message_state_message_id_namespace_primary_key PRIMARY KEY ( message_id , namespace );
\ No newline at end of file